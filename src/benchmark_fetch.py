@@ -0,0 +1,64 @@
+"""benchmark_fetch.py - measures the fetch throughput against the local replay server (see kraken_replay.py).
+
+Nothing is sent to Kraken, so fetcher changes can be compared offline run against run.
+Without --recordings made up responses are written to a temporary directory first.
+
+to run file,
+python benchmark_fetch.py --pairs 50 --rows 720 --latency 0.05 --jobs 1 8 32
+
+"""
+
+import argparse
+import tempfile
+import time
+
+from kraken_fetcher import KrakenFetcher, ENDPOINTS
+from kraken_parse   import parse_ohlc, parse_spread, parse_trades
+from kraken_replay  import ReplayServer, write_synthetic_recordings
+
+
+PARSERS = {'OHLC': parse_ohlc, 'Spread': parse_spread, 'Trades': parse_trades}
+
+
+def run_benchmark(url: str, pairs: list[str], intervals: list[str], endpoints: list[str], jobs: int, rate: float) -> dict:
+    """Fetches and parses every pair x interval x endpoint once, returns the elapsed time, requests/sec and rows/sec."""
+    fetcher = KrakenFetcher(url, rate=rate, burst=rate, jobs=jobs)
+    start   = time.perf_counter()
+    results = fetcher.fetch(pairs, intervals, endpoints)
+    rows    = sum(len(PARSERS[endpoint](result[0])['time']) for (endpoint, _, _), result in results.items() if result is not None)
+    elapsed = time.perf_counter() - start
+    fetcher.close()
+
+    return {'jobs': jobs, 'requests': len(results), 'rows': rows, 'seconds': elapsed,
+            'requests/sec': len(results) / elapsed, 'rows/sec': rows / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="fetch throughput against the local replay server")
+    parser.add_argument('--recordings',       help="directory of recorded responses, made up ones by default")
+    parser.add_argument('--pairs',            type=int,   default=50)
+    parser.add_argument('--rows',             type=int,   default=720, help="rows of every made up response")
+    parser.add_argument('--intervals',        nargs='+',  default=['1'])
+    parser.add_argument('--endpoints',        nargs='+',  default=ENDPOINTS)
+    parser.add_argument('--latency',          type=float, default=0.05, help="seconds the server waits before every answer")
+    parser.add_argument('--rate-limit-every', type=int,   default=None, help="answer every n-th call with a rate limit error")
+    parser.add_argument('--rate',             type=float, default=1000.0, help="token bucket calls per second of the fetcher")
+    parser.add_argument('--jobs',             type=int,   nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    pairs = [f"PAIR{i}USD" for i in range(args.pairs)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.recordings is None:
+            write_synthetic_recordings(directory, pairs, args.rows, args.intervals)
+
+        server = ReplayServer(args.recordings or directory, latency=args.latency, rate_limit_every=args.rate_limit_every)
+
+        print(f"{'jobs':>6} {'requests':>9} {'rows':>10} {'seconds':>9} {'requests/sec':>13} {'rows/sec':>12}")
+
+        for jobs in args.jobs:
+            result = run_benchmark(server.url, pairs, args.intervals, args.endpoints, jobs, args.rate)
+            print(f"{result['jobs']:>6} {result['requests']:>9} {result['rows']:>10} {result['seconds']:>9.2f} "
+                  f"{result['requests/sec']:>13.1f} {result['rows/sec']:>12.0f}")
+
+        server.close()
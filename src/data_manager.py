@@ -0,0 +1,227 @@
+"""data_manager.py - command line entry point for the historical data.
+
+    python data_manager.py fetch    XBTUSD ETHUSD --intervals 1 60 --endpoints OHLC Spread --jobs 8
+    python data_manager.py backfill XBTUSD ETHUSD --intervals 1 --jobs 2
+    python data_manager.py convert  historical_data/gemini/BTCUSD/*.csv --jobs 4
+    python data_manager.py resample historical_data/gemini/BTCUSD/gemini_BTCUSD_1min_all.csv --timeframes 1h 4h 1d
+    python data_manager.py verify   [NAME ...]
+    python data_manager.py list
+
+Every dataset that is written is recorded in the manifest (see strategies/data_manifest.py) with its row count,
+time range and content fingerprint. verify re-hashes the files on disk and reports the datasets that changed or went missing.
+Network commands run --jobs threads that share one rate limit (--rate, --burst), convert and resample run --jobs processes.
+A fetch or backfill job whose requests fail after --retries is left out of the manifest and the command exits with 1.
+
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools          import repeat
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies'))
+
+import fetch_data
+
+from data_manifest  import read_manifest, write_manifest, register_cache, MANIFEST_PATH
+from kraken_fetcher import KrakenFetcher, KRAKEN_API
+from kraken_parse   import parse_spread
+from ohlcv_resample import build_resampled_cache, TIMEFRAME_SECONDS
+from ohlcv_store    import build_cache, compute_fingerprint, get_cache_dir, get_last_epoch, read_cache_meta
+from ohlcv_validate import validate_cache, format_report
+from spread_store   import append_spreads
+
+
+KRAKEN_DIR = "historical_data/kraken"
+
+
+def get_kraken_cache_dir(directory: str, endpoint: str, pair: str, interval: str=None) -> str:
+    """historical_data/kraken/cache/Kraken_XBTUSD_minute, historical_data/kraken/cache/Kraken_XBTUSD_spreads"""
+    if endpoint == 'OHLC':
+        name = fetch_data.get_timeframe_name(interval) or f"{interval}m"
+    else:
+        name = 'spreads'
+    return get_cache_dir(os.path.join(directory, f"Kraken_{pair}_{name}.csv"))
+
+
+def fetch(args: argparse.Namespace, manifest: dict) -> bool:
+    """
+    Appends the OHLC bars and spread quotes since the last run of every pair x interval, all pairs at once.
+    A job whose request still fails after --retries, or whose cache was built with another schema, is reported and left
+    out of the manifest. Returns False if any job failed.
+
+    """
+    fetcher   = KrakenFetcher(args.api, rate=args.rate, burst=args.burst, retries=args.retries, jobs=args.jobs)
+    endpoints = [endpoint for endpoint in args.endpoints if endpoint in ('OHLC', 'Spread')]
+    jobs      = [(endpoint, pair, interval)
+                 for pair in args.pairs
+                 for endpoint in endpoints
+                 for interval in (args.intervals if endpoint == 'OHLC' else [None])]
+
+    cache_dirs = {job: get_kraken_cache_dir(args.directory, *job) for job in jobs}
+    since      = {job: get_last_epoch(cache_dir) for job, cache_dir in cache_dirs.items()}
+    results    = fetcher.fetch(args.pairs, args.intervals, endpoints, since)
+    fetcher.close()
+
+    failures = []
+
+    for (endpoint, pair, interval), result in results.items():
+        cache_dir = cache_dirs[(endpoint, pair, interval)]
+        name      = f"kraken {endpoint} {pair}" + (f" {interval}" if interval else "")
+
+        if result is None:
+            failures.append(f"{name}: the request failed")
+            continue
+
+        try:
+            if endpoint == 'OHLC':
+                fetch_data.store_OHLC_rows(pair, interval, *result, cache_dir, args.decimal_places)
+            else:
+                append_spreads(pair, parse_spread(result[0]), cache_dir, args.decimal_places)
+        except ValueError as e:
+            failures.append(f"{name}: {e}")
+            continue
+
+        if read_cache_meta(cache_dir) is not None:
+            register_cache(manifest, cache_dir, name)
+
+    for failure in failures:
+        print(failure)
+    return len(failures) == 0
+
+
+def backfill(args: argparse.Namespace, manifest: dict) -> bool:
+    """
+    Backfills every pair x interval on --jobs threads. All pages go through one KrakenFetcher, so the threads share
+    its rate limit and retries. A job whose pages still fail is reported and left out of the manifest,
+    a later run resumes it. Returns False if any job failed.
+
+    """
+
+    jobs    = [(pair, interval) for pair in args.pairs for interval in args.intervals]
+    fetcher = KrakenFetcher(args.api, rate=args.rate, burst=args.burst, retries=args.retries, jobs=args.jobs)
+
+    def run(job: tuple) -> str | None:
+        pair, interval = job
+        cache_dir      = get_kraken_cache_dir(args.directory, 'OHLC', pair, interval)
+
+        try:
+            fetch_data.backfill_OHLC_data(pair, interval, cache_dir, decimal_places=args.decimal_places, fetcher=fetcher)
+        except RuntimeError as e:
+            print(e)
+            return None
+        return cache_dir
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        cache_dirs = list(executor.map(run, jobs))
+    fetcher.close()
+
+    for (pair, interval), cache_dir in zip(jobs, cache_dirs):
+        if cache_dir is not None and read_cache_meta(cache_dir) is not None:
+            register_cache(manifest, cache_dir, f"kraken OHLC {pair} {interval}")
+    return all(cache_dir is not None for cache_dir in cache_dirs)
+
+
+def convert(args: argparse.Namespace, manifest: dict) -> None:
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        cache_dirs = list(executor.map(build_cache, args.csv_paths, repeat(None), repeat(args.decimal_places)))
+
+    for csv_path, cache_dir in zip(args.csv_paths, cache_dirs):
+        register_cache(manifest, cache_dir, csv_path)
+    return
+
+
+def resample(args: argparse.Namespace, manifest: dict) -> None:
+    jobs = [(csv_path, timeframe) for csv_path in args.csv_paths for timeframe in args.timeframes]
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        cache_dirs = list(executor.map(build_resampled_cache, *zip(*jobs), repeat(None), repeat(args.decimal_places)))
+
+    for (csv_path, timeframe), cache_dir in zip(jobs, cache_dirs):
+        register_cache(manifest, cache_dir, f"{csv_path} {timeframe}")
+    return
+
+
+def verify(args: argparse.Namespace, manifest: dict) -> bool:
+    """Re-hashes the datasets and compares them with the manifest. Returns False if any of them changed."""
+    names = args.names or sorted(manifest)
+
+    def check(name: str) -> str:
+        entry = manifest.get(name)
+
+        if entry is None:
+            return "NOT IN MANIFEST"
+        if read_cache_meta(entry['cache_dir']) is None:
+            return "MISSING"
+
+        rows = read_cache_meta(entry['cache_dir'])['rows']
+
+        if compute_fingerprint(entry['cache_dir']) != entry['hash'] or rows != entry['rows']:
+            return f"CHANGED rows {entry['rows']} -> {rows}"
+        return "OK, " + format_report(validate_cache(entry['cache_dir']))
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(check, names))
+
+    for name, result in zip(names, results):
+        print(f"{name}: {result}")
+    return all(result.startswith("OK") for result in results)
+
+
+def list_datasets(args: argparse.Namespace, manifest: dict) -> None:
+    for name, entry in sorted(manifest.items()):
+        print(f"{name:<40} {entry['rows']:>12,} rows  {entry['start']} - {entry['end']}  {entry['hash'].split(':')[-1][:12]}")
+    return
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="fetch, convert and verify the historical data")
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--jobs',     type=int, default=os.cpu_count())
+
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for name in ('fetch', 'backfill'):
+        command = commands.add_parser(name)
+        command.add_argument('pairs',            nargs='+', help="kraken pair names, ie. XBTUSD")
+        command.add_argument('--intervals',      nargs='+', default=['1'], help="OHLC intervals in minutes")
+        command.add_argument('--directory',      default=KRAKEN_DIR)
+        command.add_argument('--decimal-places', type=int, default=None)
+        command.add_argument('--api',            default=KRAKEN_API)
+        command.add_argument('--rate',           type=float, default=1.0, help="calls per second, shared by all --jobs")
+        command.add_argument('--burst',          type=float, default=1.0)
+        command.add_argument('--retries',        type=int,   default=5, help="retries of a failed call, with exponential backoff")
+
+    commands.choices['fetch'].add_argument('--endpoints', nargs='+', default=['OHLC', 'Spread'], choices=['OHLC', 'Spread'])
+
+    for name in ('convert', 'resample'):
+        command = commands.add_parser(name)
+        command.add_argument('csv_paths',        nargs='+')
+        command.add_argument('--decimal-places', type=int, default=None)
+
+    commands.choices['resample'].add_argument('--timeframes', nargs='+', default=['1d'], choices=list(TIMEFRAME_SECONDS))
+
+    commands.add_parser('verify').add_argument('names', nargs='*', help="every dataset of the manifest by default")
+    commands.add_parser('list')
+    return parser
+
+
+def main(argv: list[str]=None) -> int:
+    args     = get_parser().parse_args(argv)
+    manifest = read_manifest(args.manifest)
+
+    if args.command == 'verify':
+        return 0 if verify(args, manifest) else 1
+    if args.command == 'list':
+        list_datasets(args, manifest)
+        return 0
+
+    failed = {'fetch': fetch, 'backfill': backfill, 'convert': convert, 'resample': resample}[args.command](args, manifest) is False
+    write_manifest(manifest, args.manifest)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
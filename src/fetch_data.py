@@ -1,30 +1,170 @@
 # First import the libraries that we need to use
+import numpy as np
 import pandas as pd
-import requests
-import json
+import os
+import sys
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies'))
 
-def fetch_OHLC_data(symbol, timeframe):
-    """This function will get Open/High/Low/Close, Volume and tradecount data for the pair passed and save to CSV"""
+from kraken_fetcher import KrakenFetcher
+from kraken_parse import parse_ohlc, parse_spread, parse_trades
+from spread_store import append_spreads, get_spread_cache_dir
+from ohlcv_store import append_cache, compact_cache, get_cache_dir, get_last_epoch, get_schema, encode_prices, CACHE_VERSION
+
+
+KRAKEN_API     = 'https://api.kraken.com/0/public'
+BACKFILL_PAUSE = 1.0 # seconds between pages, the public endpoints allow about one call per second
+
+
+def get_timeframe_name(timeframe):
+    """Kraken interval in minutes -> the name used in the file names"""
+    return {'1': 'minute', '60': 'hour', '1440': 'day'}.get(str(timeframe), '')
+
+
+def get_OHLC_source_key(symbol, timeframe, schema):
+    """Kraken caches have no csv behind them, they are keyed by the pair and interval instead"""
+    return {'version': CACHE_VERSION, 'exchange': 'kraken', 'pair': symbol, 'interval': str(timeframe), 'schema': schema}
+
+
+def parse_OHLC_rows(rows, schema):
+    """Kraken OHLC rows -> typed columns in the layout of the columnar store"""
+    columns = parse_ohlc(rows)
+    return {
+        'Epoch':  columns['time'],
+        'Open':   encode_prices(columns['open'],  schema),
+        'High':   encode_prices(columns['high'],  schema),
+        'Low':    encode_prices(columns['low'],   schema),
+        'Close':  encode_prices(columns['close'], schema),
+        'Vwap':   encode_prices(columns['vwap'],  schema),
+        'Volume': columns['volume'].astype(schema['volume']),
+        'Count':  columns['count'],
+    }
+
+
+def fetch_rows(endpoint, symbol, interval=None, since=None, fetcher=None):
+    """Returns (rows, last) of a single page of a public endpoint, None if the request failed.
+    The call goes through fetcher (a one off KrakenFetcher by default), so it is rate limited and retried with backoff"""
+    if fetcher is not None:
+        return fetcher.fetch_rows(endpoint, symbol, interval, since)
+
+    fetcher = KrakenFetcher(KRAKEN_API, jobs=1)
+    try:
+        return fetcher.fetch_rows(endpoint, symbol, interval, since)
+    finally:
+        fetcher.close()
+
+
+def fetch_OHLC_page(symbol, timeframe, since=None, fetcher=None):
+    """Returns (rows, last) of a single OHLC page, None if the request failed.
+    With a KrakenFetcher the call shares its rate limit"""
+    return fetch_rows('OHLC', symbol, timeframe, since, fetcher)
+
+
+def get_PRINTS_frame(columns):
+    """Typed trade columns (see kraken_parse.parse_trades) -> the layout of the tradeprints csv files,
+    buysell stays "buy"/"sell" and ordtype "market"/"limit" on disk"""
+    data = pd.DataFrame({'price':   columns['price'],
+                         'volume':  columns['volume'],
+                         'time':    columns['time'],
+                         'buysell': np.where(columns['buysell'] == 1, 'buy', 'sell'),
+                         'ordtype': np.where(columns['market'], 'market', 'limit')})
+    data['date']         = pd.to_datetime(data['time'], unit='s')
+    data['dollaramount'] = columns['dollaramount']
+    return data
+
+
+def get_OHLC_cache_dir(symbol, timeframe):
+    return get_cache_dir(f'Kraken_{symbol}_{get_timeframe_name(timeframe)}.csv')
+
+
+def update_OHLC_data(symbol, timeframe, cache_dir=None, since=None, decimal_places=None, fetcher=None):
+    """
+    Fetches the bars after the newest stored bar and appends them to the columnar store as a new segment,
+    the stored history is never read or rewritten. The bar that overlaps the stored ones is dropped.
+
+    Only committed bars are stored, the last row of a page is the bar that is still open.
+    Returns (bars stored, last cursor), None if the request failed.
+    """
+    cache_dir = cache_dir or get_OHLC_cache_dir(symbol, timeframe)
+    stored    = get_last_epoch(cache_dir)
+    page      = fetch_OHLC_page(symbol, timeframe, stored if stored is not None else since, fetcher)
+    if page is None:
+        return None
+    rows, last = page
+    return store_OHLC_rows(symbol, timeframe, rows, last, cache_dir, decimal_places), last
+
+
+def store_OHLC_rows(symbol, timeframe, rows, last, cache_dir=None, decimal_places=None):
+    """Appends the committed bars of a page (time <= last) to the columnar store, returns the number of bars stored"""
+    schema     = get_schema(decimal_places)
+    source_key = get_OHLC_source_key(symbol, timeframe, schema)
+    cache_dir  = cache_dir or get_OHLC_cache_dir(symbol, timeframe)
+    columns    = parse_OHLC_rows(rows, schema)
+    committed  = columns['Epoch'] <= last
+    appended   = append_cache(symbol, {column: values[committed] for column, values in columns.items()}, cache_dir, source_key)
+    print(f"Kraken {symbol} {timeframe}m: {appended} bars stored up to {pd.to_datetime(last, unit='s')}")
+    return appended
+
+
+def update_SPREAD_data(symbol, cache_dir=None, decimal_places=None, fetcher=None):
+    """Fetches the bid/ask quotes after the newest stored one and appends them to the spread store
+    (see strategies/spread_store.py). Returns the number of quotes stored, None if the request failed"""
+    cache_dir = cache_dir or get_spread_cache_dir(symbol)
+    page      = fetch_rows('Spread', symbol, since=get_last_epoch(cache_dir), fetcher=fetcher)
+    if page is None:
+        return None
+    appended = append_spreads(symbol, parse_spread(page[0]), cache_dir, decimal_places)
+    print(f"Kraken {symbol} spread: {appended} quotes stored")
+    return appended
+
+
+def backfill_OHLC_data(symbol, timeframe, cache_dir=None, since=None, decimal_places=None, pause=BACKFILL_PAUSE, fetcher=None):
+    """
+    Follows the since/last cursor from page to page until caught up and appends every page to the columnar store
+    (cache/Kraken_{symbol}_{tf}, see ohlcv_store.py). A later run resumes from the newest stored bar,
+    so an interrupted backfill is simply started again. The segments are merged per month once caught up.
+
+    Every page goes through fetcher (a KrakenFetcher, one allowing a call every pause seconds by default), so pages
+    are rate limited and retried with backoff. Pass one fetcher to every thread to share its rate limit.
+    Raises RuntimeError when a page still fails after the retries, the bars stored until then are kept.
+
+    Returns the number of bars stored.
+    """
+    cache_dir = cache_dir or get_OHLC_cache_dir(symbol, timeframe)
+    owned     = fetcher is None
+    fetcher   = fetcher or KrakenFetcher(KRAKEN_API, rate=1 / pause, jobs=1)
+    total     = 0
+
+    try:
+        while True:
+            update = update_OHLC_data(symbol, timeframe, cache_dir, since, decimal_places, fetcher)
+            if update is None:
+                raise RuntimeError(f"Kraken {symbol} {timeframe}m: backfill stopped after {total} bars, the request failed")
+            appended, last = update
+            total += appended
+
+            if appended == 0:
+                break # caught up, no committed bar after the newest stored one up to the last cursor
+    finally:
+        if owned:
+            fetcher.close()
+
+    if total > 0:
+        compact_cache(cache_dir)
+    return total
+
+
+def fetch_OHLC_data(symbol, timeframe, backfill=False, cache_dir=None):
+    """This function will get Open/High/Low/Close, Volume and tradecount data for the pair passed and save to CSV.
+    With backfill=True every page of the history is fetched into the columnar store instead, see backfill_OHLC_data()"""
     pair_split = symbol.split('/')  # symbol must be in format XXX/XXX ie. BTC/USD
     symbol = pair_split[0] + pair_split[1]
-    url = f'https://api.kraken.com/0/public/OHLC?pair={symbol}&interval={timeframe}'
-    response = requests.get(url)
-    if response.status_code == 200:  # check to make sure the response from server is good
-        j = json.loads(response.text)
-        result = j['result']
-        keys = []
-        for item in result:
-            keys.append(item)
-        if keys[0] != 'last':
-            data = pd.DataFrame(result[keys[0]],
-                                columns=['unix', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'tradecount'])
-        else:
-            data = pd.DataFrame(result[keys[1]],
-                                columns=['unix', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'tradecount'])
-
-        data['date'] = pd.to_datetime(data['unix'], unit='s')
-        data['volume_from'] = data['volume'].astype(float) * data['close'].astype(float)
+    if backfill:
+        return backfill_OHLC_data(symbol, timeframe, cache_dir)
+    page = fetch_rows('OHLC', symbol, timeframe)
+    if page is not None:  # check to make sure the response from server is good
+        data = pd.DataFrame(parse_ohlc(page[0])).rename(columns={'time': 'unix', 'count': 'tradecount'})
+        data.insert(8, 'date', pd.to_datetime(data['unix'], unit='s'))
 
         # if we failed to get any data, print an error...otherwise write the file
         if data is None:
@@ -47,21 +187,10 @@ def fetch_SPREAD_data(symbol):
         the results to a CSV file"""
     pair_split = symbol.split('/')  # symbol must be in format XXX/XXX ie. BTC/USD
     symbol = pair_split[0] + pair_split[1]
-    url = f'https://api.kraken.com/0/public/Spread?pair={symbol}'
-    response = requests.get(url)
-    if response.status_code == 200:  # check to make sure the response from server is good
-        j = json.loads(response.text)
-        result = j['result']
-        keys = []
-        for item in result:
-            keys.append(item)
-        if keys[0] != 'last':
-            data = pd.DataFrame(result[keys[0]], columns=['unix', 'bid', 'ask'])
-        else:
-            data = pd.DataFrame(result[keys[1]], columns=['unix', 'bid', 'ask'])
-
-        data['date'] = pd.to_datetime(data['unix'], unit='s')
-        data['spread'] = data['ask'].astype(float) - data['bid'].astype(float)
+    page = fetch_rows('Spread', symbol)
+    if page is not None:  # check to make sure the response from server is good
+        data = pd.DataFrame(parse_spread(page[0])).rename(columns={'time': 'unix'})
+        data.insert(3, 'date', pd.to_datetime(data['unix'], unit='s'))
 
         # if we failed to get any data, print an error...otherwise write the file
         if data is None:
@@ -75,25 +204,9 @@ def fetch_PRINTS_data(symbol):
     """This function will return historical trade prints for the symbol passed and save the results to a CSV file"""
     pair_split = symbol.split('/')  # symbol must be in format XXX/XXX ie. BTC/USD
     symbol = pair_split[0] + pair_split[1]
-    url = f'https://api.kraken.com/0/public/Trades?pair={symbol}'
-    response = requests.get(url)
-    if response.status_code == 200:  # check to make sure the response from server is good
-        j = json.loads(response.text)
-
-        result = j['result']
-        keys = []
-        for item in result:
-            keys.append(item)
-        if keys[0] != 'last':
-            data = pd.DataFrame(result[keys[0]], columns=['price', 'volume', 'time', 'buysell', 'ordtype', 'misc'])
-        else:
-            data = pd.DataFrame(result[keys[1]], columns=['price', 'volume', 'time', 'buysell', 'ordtype', 'misc'])
-
-        data['date'] = pd.to_datetime(data['time'], unit='s')
-        data['buysell'] = data['buysell'].apply(lambda x: "buy" if x == 'b' else "sell")
-        data['ordtype'] = data['ordtype'].apply(lambda x: "limit" if x == 'l' else "market")
-        data['dollaramount'] = data['price'].astype(float) * data['volume'].astype(float)
-        data.drop(columns=['misc'], inplace=True)  #drop misc column that is typically blank
+    page = fetch_rows('Trades', symbol)
+    if page is not None:  # check to make sure the response from server is good
+        data = get_PRINTS_frame(parse_trades(page[0]))
 
         # if we failed to get any data, print an error...otherwise write the file
         if data is None:
@@ -109,7 +222,10 @@ if __name__ == "__main__":
     pair = "BTC/USD"
     # full timeframe intervals found here: https://www.kraken.com/en-us/features/api#get-ohlc-data
     fetch_OHLC_data(symbol=pair, timeframe='1') # fetches minute data
+    # fetch_OHLC_data(symbol=pair, timeframe='1', backfill=True) # fetches every page of minute data into the columnar store
+    # update_OHLC_data(symbol='XBTUSD', timeframe='1') # appends the minute bars since the last run to the columnar store
     # fetch_OHLC_data(symbol=pair, timeframe='60')  # fetches hourly data
     # fetch_OHLC_data(symbol=pair, timeframe='1440')  # fetches daily data
     fetch_SPREAD_data(symbol=pair) # gets bid/ask spread data
+    # update_SPREAD_data(symbol='XBTUSD') # appends the bid/ask quotes since the last run to the spread store
     fetch_PRINTS_data(symbol=pair) # gets historical trade print data
\ No newline at end of file
@@ -0,0 +1,168 @@
+"""kraken_fetcher.py - fetches many pairs, intervals and endpoints at once.
+
+fetch_data.py fetches one pair and one interval at a time, so refreshing 50 pairs takes the sum of 50+ round trips.
+KrakenFetcher runs the requests on a thread pool over one pooled requests.Session, so a refresh takes about
+as long as the slowest request. A token bucket keeps the calls under the rate limit of the public api and
+failed calls (connection errors, 5xx, 429, bodies that are not json, Kraken rate limit / busy errors) are retried
+with exponential backoff.
+
+    fetcher = KrakenFetcher(rate=1.0, burst=5, jobs=8)
+    results = fetcher.fetch(['XBTUSD', 'ETHUSD'], intervals=['1', '60'], endpoints=['OHLC', 'Spread', 'Trades'])
+
+    rows, last = results[('OHLC', 'XBTUSD', '1')]
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import threading
+import time
+
+import requests
+
+from requests.adapters import HTTPAdapter
+
+
+KRAKEN_API = 'https://api.kraken.com/0/public'
+ENDPOINTS  = ['OHLC', 'Spread', 'Trades']
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+RETRY_ERRORS = ('EAPI:Rate limit exceeded', 'EService:Unavailable', 'EService:Busy', 'EGeneral:Too many requests')
+
+
+class TokenBucket():
+    """
+    Allows rate calls per second on average and bursts of up to capacity calls.
+
+    Every call takes a token, the tokens refill continuously at rate per second.
+    acquire() blocks until a token is free, the bucket is shared by all threads of the fetcher.
+
+    """
+
+    def __init__(self, rate: float, capacity: float=1.0) -> None:
+        self.rate:     float = rate
+        self.capacity: float = capacity
+        self.tokens:   float = capacity
+        self.updated:  float = time.monotonic()
+        self.lock            = threading.Lock()
+        return
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now          = time.monotonic()
+                self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait = (1.0 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class KrakenFetcher():
+    def __init__(self,
+                 base_url: str=KRAKEN_API,
+                 rate: float=1.0,
+                 burst: float=1.0,
+                 retries: int=5,
+                 backoff: float=0.5,
+                 jobs: int=8,
+                 timeout: float=10.0) -> None:
+
+        self.base_url: str         = base_url.rstrip('/')
+        self.bucket:   TokenBucket = TokenBucket(rate, burst)
+        self.retries:  int         = retries
+        self.backoff:  float       = backoff
+        self.jobs:     int         = jobs
+        self.timeout:  float       = timeout
+
+        # one connection pool shared by every thread, the connections are kept alive between calls
+        self.session = requests.Session()
+        self.session.mount('http://',  HTTPAdapter(pool_connections=1, pool_maxsize=jobs))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=jobs))
+        return
+
+    def close(self) -> None:
+        self.session.close()
+        return
+
+    def request(self, endpoint: str, params: dict) -> dict | None:
+        """Returns the 'result' of the call, None once every retry failed."""
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(self.backoff * 2**(attempt - 1))
+
+            self.bucket.acquire()
+
+            try:
+                response = self.session.get(f"{self.base_url}/{endpoint}", params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+                continue
+
+            if response.status_code in RETRY_STATUS:
+                error = f"HTTP {response.status_code}"
+                continue
+            if response.status_code != 200:
+                print(f"{endpoint} {params}: HTTP {response.status_code}")
+                return None
+
+            try:
+                j = response.json()
+            except ValueError as e: # a truncated body or an html error page
+                error = f"invalid response, {e}"
+                continue
+
+            if j.get('error'):
+                error = ", ".join(j['error'])
+                if any(message in error for message in RETRY_ERRORS):
+                    continue
+                print(f"{endpoint} {params}: {error}")
+                return None
+            return j['result']
+
+        print(f"{endpoint} {params}: gave up after {self.retries + 1} attempts, {error}")
+        return None
+
+    def fetch_rows(self, endpoint: str, pair: str, interval: str=None, since: int=None) -> tuple[list, int] | None:
+        """Returns (rows, last) of one call, None if it failed."""
+        params = {'pair': pair}
+
+        if interval is not None:
+            params['interval'] = interval
+        if since is not None:
+            params['since'] = since
+
+        result = self.request(endpoint, params)
+
+        if result is None:
+            return None
+        rows = next(value for key, value in result.items() if key != 'last')
+        return rows, int(result['last'])
+
+    def fetch(self,
+              pairs: list[str],
+              intervals: list[str]=('1',),
+              endpoints: list[str]=ENDPOINTS,
+              since: dict=None) -> dict:
+        """
+        Fetches every pair x interval x endpoint concurrently.
+        Only OHLC has intervals, Spread and Trades are fetched once per pair.
+        since optionally maps a job to the cursor it should start from.
+
+        Returns {(endpoint, pair, interval or None): (rows, last) or None}
+
+        """
+
+        jobs = [(endpoint, pair, interval)
+                for pair in pairs
+                for endpoint in endpoints
+                for interval in (intervals if endpoint == 'OHLC' else [None])]
+
+        since = since or dict()
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            results = list(executor.map(lambda job: self.fetch_rows(*job, since=since.get(job)), jobs))
+        return dict(zip(jobs, results))
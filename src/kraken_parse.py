@@ -0,0 +1,55 @@
+"""kraken_parse.py - decodes the rows of the Kraken public endpoints straight into typed numpy columns.
+
+The api sends every number as a string. Building a DataFrame of strings and calling .astype(float) and
+.apply(lambda ...) on it goes through the rows again for every column. Here the rows are transposed once
+(zip(*rows)) and numpy converts every field to its type in C. The flags become int8/bool columns and the
+derived columns are computed on the whole arrays.
+
+    OHLC:   time int64, open/high/low/close/vwap/volume float64, count int32, volume_from float64
+    Spread: time int64, bid/ask float64, spread float64
+    Trades: price/volume float64, time float64, buysell int8 (1 buy, -1 sell), market bool, dollaramount float64,
+            trade_id int64 when the api sends it
+
+"""
+
+import numpy as np
+
+
+OHLC_FIELDS   = [('time', np.int64), ('open', np.float64), ('high', np.float64), ('low', np.float64), ('close', np.float64),
+                 ('vwap', np.float64), ('volume', np.float64), ('count', np.int32)]
+SPREAD_FIELDS = [('time', np.int64), ('bid', np.float64), ('ask', np.float64)]
+TRADE_FIELDS  = [('price', np.float64), ('volume', np.float64), ('time', np.float64), ('buysell', None), ('ordtype', None),
+                 ('misc', None), ('trade_id', np.int64)]
+
+
+def to_columns(rows: list, fields: list[tuple]) -> dict:
+    """Transposes the rows once and converts every typed field. Fields typed None are kept as they are."""
+    values = list(zip(*rows)) if len(rows) > 0 else [()] * len(fields)
+
+    return {name: np.array(column, dtype=dtype) if dtype is not None else np.array(column, dtype=str)
+            for (name, dtype), column in zip(fields, values)}
+
+
+def parse_ohlc(rows: list) -> dict:
+    columns = to_columns(rows, OHLC_FIELDS)
+    columns['volume_from'] = columns['volume'] * columns['close']
+    return columns
+
+
+def parse_spread(rows: list) -> dict:
+    columns = to_columns(rows, SPREAD_FIELDS)
+    columns['spread'] = columns['ask'] - columns['bid']
+    return columns
+
+
+def parse_trades(rows: list) -> dict:
+    columns = to_columns(rows, TRADE_FIELDS)
+    side    = columns.pop('buysell')
+    ordtype = columns.pop('ordtype')
+
+    del columns['misc'] # typically blank
+
+    columns['buysell']      = np.where(side == 'b', 1, -1).astype(np.int8)
+    columns['market']       = ordtype == 'm'
+    columns['dollaramount'] = columns['price'] * columns['volume']
+    return columns
@@ -0,0 +1,177 @@
+"""kraken_replay.py - local server that replays recorded responses of the public Kraken endpoints.
+
+The fetchers can be tested and benchmarked offline and every run sees the same data.
+A recording is one json file per endpoint, pair and interval holding the response as Kraken sent it:
+
+    recordings/OHLC_XBTUSD_1.json
+    recordings/Spread_XBTUSD.json
+    recordings/Trades_XBTUSD.json
+
+The server answers /0/public/OHLC, /Spread and /Trades like the api does: only the rows after `since` are sent,
+at most page_size rows per call. Every call waits latency seconds and every rate_limit_every-th call is answered
+with an 'EAPI:Rate limit exceeded' error.
+
+    server = ReplayServer('recordings', latency=0.05, rate_limit_every=10)
+    fetcher = KrakenFetcher(server.url)
+    ...
+    server.close()
+
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import json
+import os
+import threading
+import time
+
+from kraken_fetcher import ENDPOINTS
+
+
+TIME_FIELD = {'OHLC': 0, 'Spread': 0, 'Trades': 2} # position of the timestamp in the rows of every endpoint
+
+
+def get_cursor(endpoint: str, row: list) -> int | str:
+    """The 'last' cursor pointing at a row, the trades cursor is the time in nanoseconds as a string."""
+    if endpoint == 'Trades':
+        return str(round(float(row[TIME_FIELD[endpoint]]) * 1e9))
+    return row[TIME_FIELD[endpoint]]
+
+
+def get_recording_name(endpoint: str, pair: str, interval: str=None) -> str:
+    return f"{endpoint}_{pair}_{interval}.json" if endpoint == 'OHLC' else f"{endpoint}_{pair}.json"
+
+
+def record_responses(fetcher, directory: str, pairs: list[str], intervals: list[str]=('1',), endpoints: list[str]=ENDPOINTS) -> None:
+    """Records the current responses of the api (or of whatever fetcher.base_url points at) into directory."""
+    os.makedirs(directory, exist_ok=True)
+
+    for endpoint in endpoints:
+        for pair in pairs:
+            for interval in (intervals if endpoint == 'OHLC' else [None]):
+                params = {'pair': pair} if interval is None else {'pair': pair, 'interval': interval}
+                result = fetcher.request(endpoint, params)
+
+                if result is not None:
+                    with open(os.path.join(directory, get_recording_name(endpoint, pair, interval)), 'w') as file:
+                        json.dump({'error': [], 'result': result}, file)
+    return
+
+
+def write_synthetic_recordings(directory: str, pairs: list[str], rows: int, intervals: list[str]=('1',), start: int=1609459200) -> None:
+    """Writes recordings of made up rows shaped like the api responses, for benchmarks without any recordings."""
+    os.makedirs(directory, exist_ok=True)
+
+    for pair in pairs:
+        recordings = {get_recording_name('Spread', pair): [[start + i, f"{29000 + i % 50}.0", f"{29000.5 + i % 50}"] for i in range(rows)],
+                      get_recording_name('Trades', pair): [[f"{29000 + i % 50}.0", "0.01", start + i / 10, 'b' if i % 2 else 's',
+                                                            'm' if i % 3 else 'l', "", i] for i in range(rows)]}
+
+        for interval in intervals:
+            seconds = int(interval) * 60
+            recordings[get_recording_name('OHLC', pair, interval)] = [[start + i * seconds, "29000.0", "29050.0", "28950.0", "29010.0",
+                                                                      "29005.0", "1.5", 10] for i in range(rows)]
+
+        for name, recorded in recordings.items():
+            endpoint = name.split('_')[0]
+            last     = recorded[-2][0] if endpoint == 'OHLC' else get_cursor(endpoint, recorded[-1])
+
+            with open(os.path.join(directory, name), 'w') as file:
+                json.dump({'error': [], 'result': {pair: recorded, 'last': last}}, file)
+    return
+
+
+class ReplayServer():
+    def __init__(self,
+                 directory: str,
+                 latency: float=0.0,
+                 rate_limit_every: int=None,
+                 page_size: int=None,
+                 host: str='127.0.0.1',
+                 port: int=0) -> None:
+
+        self.latency:          float = latency
+        self.rate_limit_every: int   = rate_limit_every
+        self.page_size:        int   = page_size
+        self.requests:         int   = 0
+        self.rows:             int   = 0
+        self.lock                    = threading.Lock()
+        self.recordings:       dict  = dict()
+
+        for filename in os.listdir(directory):
+            if filename.endswith('.json'):
+                with open(os.path.join(directory, filename)) as file:
+                    self.recordings[filename] = json.load(file)
+
+        self.server = ThreadingHTTPServer((host, port), self.__make_handler())
+        self.url    = f"http://{host}:{self.server.server_address[1]}/0/public"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        return
+
+    def get_response(self, endpoint: str, params: dict) -> dict:
+        """The recorded response cut down to the rows after since, at most page_size of them."""
+        recording = self.recordings.get(get_recording_name(endpoint, params.get('pair'), params.get('interval', '1')))
+
+        if recording is None:
+            return {'error': ['EQuery:Unknown asset pair']}
+
+        pair, rows = next((key, value) for key, value in recording['result'].items() if key != 'last')
+        last       = recording['result']['last']
+        field      = TIME_FIELD[endpoint]
+
+        if 'since' in params:
+            since = float(params['since'])
+            since = since / 1e9 if since > 1e12 else since # the trades cursor is in nanoseconds
+            rows  = [row for row in rows if float(row[field]) > since]
+
+        if self.page_size is not None and len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            last = get_cursor(endpoint, rows[-1])
+
+        if len(rows) == 0 and 'since' in params:
+            last = params['since']
+
+        with self.lock:
+            self.rows += len(rows)
+        return {'error': [], 'result': {pair: rows, 'last': last}}
+
+    def __make_handler(self) -> type:
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                url      = urlparse(self.path)
+                params   = {key: values[0] for key, values in parse_qs(url.query).items()}
+                endpoint = url.path.rstrip('/').split('/')[-1]
+
+                with replay.lock:
+                    replay.requests += 1
+                    limited = replay.rate_limit_every is not None and replay.requests % replay.rate_limit_every == 0
+
+                time.sleep(replay.latency)
+
+                if limited:
+                    body = {'error': ['EAPI:Rate limit exceeded']}
+                elif endpoint not in TIME_FIELD:
+                    body = {'error': ['EGeneral:Unknown method']}
+                else:
+                    body = replay.get_response(endpoint, params)
+
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            def log_message(self, *args) -> None:
+                return
+
+        return Handler
@@ -1,11 +1,14 @@
 from __future__                  import (absolute_import, division, print_function, unicode_literals)
 
 from dca                         import DCA
+from dca_ladder                  import get_ladder_cache_info
+from ohlcv_dataset               import get_dataset
+from ohlcv_validate              import format_report
+from ohlcv_resample              import load_resampled
 from backtrader_plotting         import Bokeh
 from backtrader_plotting.schemes import Blackly
 
 import backtrader as bt
-import pandas     as pd
 
 import time
 import datetime
@@ -112,31 +115,31 @@ class BHDCA(bt.Strategy):
         if self.is_first_safety_order:
             self.is_first_safety_order = False
 
-            self.dca_take_profit_order = self.sell(price=self.dca.required_price_levels[0],
-                                               size=self.dca.total_quantity_levels[0],
+            self.dca_take_profit_order = self.sell(price=self.dca.cursor.current_required_price,
+                                               size=self.dca.cursor.current_total_quantity,
                                                trailpercent=self.params.dca_trail_percent,
-                                               plimit=self.dca.required_price_levels[0],
+                                               plimit=self.dca.cursor.current_required_price,
                                                exectype=bt.Order.StopTrailLimit)
             
-            self.dca.remove_top_safety_order()
+            self.dca.cursor.advance()
 
-            safety_order = self.buy(price=self.dca.price_levels[0],
-                                    size=self.dca.safety_order_quantity_levels[0],
+            safety_order = self.buy(price=self.dca.cursor.current_price,
+                                    size=self.dca.cursor.current_quantity,
                                     exectype=bt.Order.Limit,
                                     oco=self.dca_take_profit_order) # oco = One Cancel Others
         else:
-            self.dca_take_profit_order = self.sell(price=self.dca.required_price_levels[0],
-                                               size=self.dca.total_quantity_levels[0],
+            self.dca_take_profit_order = self.sell(price=self.dca.cursor.current_required_price,
+                                               size=self.dca.cursor.current_total_quantity,
                                                trailpercent=self.params.dca_trail_percent,
-                                               plimit=self.dca.required_price_levels[0],
+                                               plimit=self.dca.cursor.current_required_price,
                                                exectype=bt.Order.StopTrailLimit)
 
-            self.dca.remove_top_safety_order()
+            self.dca.cursor.advance()
 
             # check if we have placed all safety orders
-            if len(self.dca.price_levels) > 0:
-                safety_order = self.buy(price=self.dca.price_levels[0],
-                                        size=self.dca.safety_order_quantity_levels[0],
+            if self.dca.cursor.remaining > 0:
+                safety_order = self.buy(price=self.dca.cursor.current_price,
+                                        size=self.dca.cursor.current_quantity,
                                         exectype=bt.Order.Limit,
                                         oco=self.dca_take_profit_order) # oco = One Cancel Others
 
@@ -226,8 +229,8 @@ class BHDCA(bt.Strategy):
 
                         """instead of submitting the takeprofit and all safety orders at a single time,
                         submit one safety order and one take profit order until one of them is canceled!"""
-                        safety_order = self.buy(price=self.dca.price_levels[0],
-                                                size=self.dca.safety_order_quantity_levels[0],
+                        safety_order = self.buy(price=self.dca.cursor.current_price,
+                                                size=self.dca.cursor.current_quantity,
                                                 exectype=bt.Order.Limit,
                                                 oco=self.dca_take_profit_order) # oco = One Cancel Others
 
@@ -314,6 +317,7 @@ class BHDCA(bt.Strategy):
         profit           = self.money_format(round(profit, 2))
         self.start_value = self.money_format(round(self.start_value, 2))
         total_value      = self.money_format(round(total_value, 2))
+        cache_info       = get_ladder_cache_info()
 
         print("\n\n^^^^ FINISHED BACKTESTING ^^^^^")
         print("##########################################")
@@ -341,6 +345,7 @@ class BHDCA(bt.Strategy):
         print(f"ROI:                   {roi}")
         print(f"Start Portfolio Value: {self.start_value}")
         print(f"Final Portfolio Value: {total_value}")
+        print(f"Ladder cache:          {cache_info.hits} hits, {cache_info.misses} misses")
         print("##########################################")
         
         period_results[p] = roi
@@ -413,26 +418,21 @@ if __name__ == '__main__':
     period_results = dict()
     start_time = time.time()
 
+    dataset = get_dataset(BTC_USD_1MIN_ALL, BTCUSD_DECIMAL_PLACES) # read in the data once for every period
+    print(format_report(dataset.report))
+
     for p in range(1, 11): # PERIOD 1-10
         start_date, end_date = get_period(p)
         start_date           -= datetime.timedelta(days=200) # time required to process the 200 day simple moving average
 
-        start_date_str = start_date.strftime("%Y-%m-%d %H:%M:%S")
-        end_date_str   = end_date.strftime(  "%Y-%m-%d %H:%M:%S")
-
-        df = pd.read_csv(BTC_USD_1MIN_ALL, usecols=['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume'], skiprows=1) # read in the data
-        df = df[::-1] # reverse the data
-
-        # to improve start up speed, drop all data outside of testing timeframe
-        df = df.drop(df[df['Date'] < start_date_str].index)
-        df = df.drop(df[df['Date'] > end_date_str].index)
-
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-        df.set_index('Date', inplace=True)
+        # to improve start up speed, only hand the testing timeframe to backtrader
+        df = dataset.get_window(start_date, end_date)
 
         print(df)
 
-        data = bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+        data     = bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+        day_data = bt.feeds.PandasData(dataname=load_resampled(BTC_USD_1MIN_ALL, '1d', start_date, end_date, decimal_places=BTCUSD_DECIMAL_PLACES), # pre-resampled daily bars
+                                       timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
 
         cerebro = bt.Cerebro()
         cerebro.broker.set_cash(TEN_THOUSAND)
@@ -441,7 +441,7 @@ if __name__ == '__main__':
         # data
         cerebro.adddata(data, name='BTCUSD_MINUTE') # adding a name while using bokeh will avoid plotting error
         
-        cerebro.resampledata(data, timeframe=bt.TimeFrame.Days, compression=1, name="BTCUSD_DAY")
+        cerebro.adddata(day_data, name="BTCUSD_DAY")
         
         # strategy
         cerebro.addstrategy(BHDCA)
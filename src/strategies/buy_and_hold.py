@@ -1,7 +1,10 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
+from ohlcv_dataset  import get_dataset
+from ohlcv_validate import format_report
+from ohlcv_resample import load_resampled
+
 import backtrader as bt
-import pandas     as pd
 
 import datetime
 import os
@@ -193,32 +196,27 @@ if __name__ == '__main__':
     
     period_results = dict()
 
+    dataset = get_dataset(BTC_USD_1MIN_ALL, BTCUSD_DECIMAL_PLACES) # read in the data once for every period
+    print(format_report(dataset.report))
+
     for period in range(1, 11): # PERIOD 1-10
         start_date, end_date = get_period(period)
 
-        start_date_str = start_date.strftime("%Y-%m-%d %H:%M:%S")
-        end_date_str   = end_date.strftime(  "%Y-%m-%d %H:%M:%S")
-
-        df = pd.read_csv(BTC_USD_1MIN_ALL, usecols=['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume'], skiprows=1) # read in the data
-        df = df[::-1] # reverse the data
-
-        # to improve start up speed, drop all data outside of testing timeframe
-        df = df.drop(df[df['Date'] < start_date_str].index)
-        df = df.drop(df[df['Date'] > end_date_str].index)
-
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-        df.set_index('Date', inplace=True)
+        # to improve start up speed, only hand the testing timeframe to backtrader
+        df = dataset.get_window(start_date, end_date)
 
         print(df)
 
-        data = bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+        data     = bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+        day_data = bt.feeds.PandasData(dataname=load_resampled(BTC_USD_1MIN_ALL, '1d', start_date, end_date, decimal_places=BTCUSD_DECIMAL_PLACES), # pre-resampled daily bars
+                                       timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
 
         cerebro = bt.Cerebro()
         cerebro.broker.set_cash(TEN_THOUSAND)
         cerebro.broker.setcommission(commission=0.001)  # 0.1% of the operation value
 
         cerebro.adddata(data, name='BTCUSD_MINUTE') # adding a name while using bokeh will avoid plotting error
-        cerebro.resampledata(data, timeframe=bt.TimeFrame.Days, compression=1, name="BTCUSD_DAY")
+        cerebro.adddata(day_data, name="BTCUSD_DAY")
         
         cerebro.addstrategy(BuyAndHold)
         cerebro.addanalyzer(bt.analyzers.SharpeRatio)
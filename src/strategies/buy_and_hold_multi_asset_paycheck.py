@@ -1,10 +1,10 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 
+from ohlcv_panel                 import load_panel
 from backtrader_plotting         import Bokeh
 from backtrader_plotting.schemes import Blackly
 
 import backtrader as bt
-import pandas     as pd
 
 import datetime
 import os
@@ -21,19 +21,6 @@ BTC_USD_1DAY_ALL      = "historical_data/gemini/BTCUSD/gemini_BTCUSD_day.csv"
 BTC_USD_2021_1MIN     = "historical_data/gemini/BTCUSD/gemini_BTCUSD_2021_1min.csv"
 BTC_USD_1MIN_ALL      = "historical_data/gemini/BTCUSD/gemini_BTCUSD_1min_all.csv"
 
-AAPL_1DAY_ALL = "historical_data/stocks/AAPL.csv"
-MSFT_1DAY_ALL = "historical_data/stocks/MSFT.csv"
-GOOG_1DAY_ALL = "historical_data/stocks/GOOG.csv"
-MCD_1DAY_ALL  = "historical_data/stocks/MCD.csv"
-PG_1DAY_ALL   = "historical_data/stocks/PG.csv"
-WMT_1DAY_ALL  = "historical_data/stocks/WMT.csv"
-CSCO_1DAY_ALL = "historical_data/stocks/CSCO.csv"
-KO_1DAY_ALL   = "historical_data/stocks/KO.csv"
-DIS_1DAY_ALL  = "historical_data/stocks/DIS.csv"
-BA_1DAY_ALL   = "historical_data/stocks/BA.csv"
-
-SPY_1DAY_ALL = "historical_data/stocks/SPY.csv"
-
 
 def get_elapsed_time(start_time: float) -> str:
     end_time     = time.time()
@@ -172,78 +159,19 @@ class BuyAndHoldMultiAssetPaycheck(bt.Strategy):
 if __name__ == '__main__':
     os.system('cls')
     
-    df_msft = pd.read_csv(MSFT_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_goog = pd.read_csv(GOOG_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_pg   = pd.read_csv(PG_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_mcd  = pd.read_csv(MCD_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_aapl = pd.read_csv(AAPL_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    
-    df_wmt  = pd.read_csv(WMT_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_csco = pd.read_csv(CSCO_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_ko   = pd.read_csv(KO_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_dis  = pd.read_csv(DIS_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    df_ba   = pd.read_csv(BA_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-    # df_spy  = pd.read_csv(SPY_1DAY_ALL, usecols=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
-
-    df_msft['Date'] = pd.to_datetime(df_msft['Date']).dt.tz_localize(None)
-    df_goog['Date'] = pd.to_datetime(df_goog['Date']).dt.tz_localize(None)
-    df_pg['Date']   = pd.to_datetime(df_pg['Date']).dt.tz_localize(None)
-    df_mcd['Date']  = pd.to_datetime(df_mcd['Date']).dt.tz_localize(None)
-    df_aapl['Date'] = pd.to_datetime(df_aapl['Date']).dt.tz_localize(None)
-
-    df_wmt['Date'] = pd.to_datetime(df_wmt['Date']).dt.tz_localize(None)
-    df_csco['Date'] = pd.to_datetime(df_csco['Date']).dt.tz_localize(None)
-    df_ko['Date'] = pd.to_datetime(df_ko['Date']).dt.tz_localize(None)
-    df_dis['Date'] = pd.to_datetime(df_dis['Date']).dt.tz_localize(None)
-    df_ba['Date'] = pd.to_datetime(df_ba['Date']).dt.tz_localize(None)
-    # df_spy['Date'] = pd.to_datetime(df_spy['Date']).dt.tz_localize(None)
-
-    df_msft.set_index('Date', inplace=True)
-    df_goog.set_index('Date', inplace=True)
-    df_pg.set_index('Date', inplace=True)
-    df_mcd.set_index('Date', inplace=True)
-    df_aapl.set_index('Date', inplace=True)
-
-    df_wmt.set_index('Date', inplace=True)
-    df_csco.set_index('Date', inplace=True)
-    df_ko.set_index('Date', inplace=True)
-    df_dis.set_index('Date', inplace=True)
-    df_ba.set_index('Date', inplace=True)
-    # df_spy.set_index('Date', inplace=True)    
+    symbols = ['MSFT', 'GOOG', 'PG', 'MCD', 'AAPL', 'WMT', 'CSCO', 'KO', 'DIS', 'BA'] # 'SPY'
+    panel   = load_panel(symbols) # every file is read in parallel and aligned on one trading calendar
 
     start_date = datetime.datetime(2004, 8, 19)
     end_date   = datetime.datetime(2022, 1, 1)
-    
-    data_msft = bt.feeds.PandasData(dataname=df_msft, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_goog = bt.feeds.PandasData(dataname=df_goog, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_pg   = bt.feeds.PandasData(dataname=df_pg, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_mcd  = bt.feeds.PandasData(dataname=df_mcd, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_aapl = bt.feeds.PandasData(dataname=df_aapl, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-
-    data_wmt   = bt.feeds.PandasData(dataname=df_wmt, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_csco = bt.feeds.PandasData(dataname=df_csco, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_ko = bt.feeds.PandasData(dataname=df_ko, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_dis = bt.feeds.PandasData(dataname=df_dis, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    data_ba = bt.feeds.PandasData(dataname=df_ba, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
-    # data_spy = bt.feeds.PandasData(dataname=df_spy, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
 
     cerebro = bt.Cerebro()
     cerebro.broker.set_cash(TEN_THOUSAND)
     cerebro.broker.setcommission(commission=0.001)
 
-    cerebro.adddata(data_msft, name="MSFT")
-    cerebro.adddata(data_goog, name="GOOG")
-    cerebro.adddata(data_pg, name="PG")
-    cerebro.adddata(data_mcd, name="MCD")
-    cerebro.adddata(data_aapl, name="AAPL")
-
-    cerebro.adddata(data_wmt, name="WMT")
-    cerebro.adddata(data_csco, name="CSCO")
-    cerebro.adddata(data_ko, name="KO")
-    cerebro.adddata(data_dis, name="DIS")
-    cerebro.adddata(data_ba, name="BA")
-
-    # cerebro.adddata(data_spy, name="SPY")
+    for symbol in panel.symbols:
+        data = bt.feeds.PandasData(dataname=panel.get_frame(symbol), timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
+        cerebro.adddata(data, name=symbol)
     
     cerebro.addstrategy(BuyAndHoldMultiAssetPaycheck)
     cerebro.addanalyzer(bt.analyzers.SharpeRatio)
@@ -0,0 +1,19 @@
+"""conftest.py - fixtures shared by the unittest_*.py files of the strategies."""
+
+import pytest
+
+
+GEMINI_CSV = """https://www.CryptoDataDownload.com
+Unix Timestamp,Date,Symbol,Open,High,Low,Close,Volume
+1609459380000,2021-01-01 00:03:00,BTCUSD,29010.5,29050.0,29000.0,29040.25,0.5
+1609459320000,2021-01-01 00:02:00,BTCUSD,29000.0,29020.0,28990.0,29010.5,1.25
+1609459260000,2021-01-01 00:01:00,BTCUSD,28990.0,29005.0,28980.0,29000.0,2.0
+1609459200000,2021-01-01 00:00:00,BTCUSD,28950.0,28995.0,28940.0,28990.0,0.75
+"""
+
+
+@pytest.fixture
+def csv_path(tmp_path) -> str:
+    path = tmp_path / "gemini_BTCUSD_1min.csv"
+    path.write_text(GEMINI_CSV)
+    return str(path)
@@ -0,0 +1,92 @@
+"""data_manifest.py - one json file that lists every columnar dataset by name.
+
+Every entry holds the cache directory, the source it was built from, the row count, the first and last bar
+and the content fingerprint of the cached columns (ohlcv_store.get_fingerprint). The entries are written by data_manager.py (fetch, backfill, convert,
+resample), so a backtest can look its data up by name without scanning or parsing any file.
+
+    df = load_by_name('gemini_BTCUSD_1min_all', start_date, end_date)
+
+"""
+
+import datetime
+import json
+import os
+
+import numpy  as np
+import pandas as pd
+
+from ohlcv_store import read_cache, read_cache_meta, get_fingerprint
+
+
+MANIFEST_PATH = "historical_data/manifest.json"
+
+
+def read_manifest(manifest_path: str=MANIFEST_PATH) -> dict:
+    try:
+        with open(manifest_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return dict()
+
+
+def write_manifest(manifest: dict, manifest_path: str=MANIFEST_PATH) -> None:
+    directory = os.path.dirname(manifest_path)
+
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=4, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return
+
+
+def get_epoch_date(epoch: int | None) -> str | None:
+    return str(np.datetime64(epoch, 's')).replace('T', ' ') if epoch is not None else None
+
+
+def describe_cache(cache_dir: str, source: str=None) -> dict:
+    """The manifest entry of a cache."""
+    meta       = read_cache_meta(cache_dir)
+    partitions = meta['partitions']
+
+    return {
+        'cache_dir': cache_dir,
+        'source':    source,
+        'symbol':    meta.get('symbol'),
+        'schema':    meta['schema'],
+        'rows':      meta['rows'],
+        'start':     get_epoch_date(partitions[0]['start'] if len(partitions) > 0 else None),
+        'end':       get_epoch_date(partitions[-1]['end']  if len(partitions) > 0 else None),
+        'hash':      get_fingerprint(cache_dir),
+        'updated':   datetime.datetime.now(datetime.UTC).strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def get_dataset_name(cache_dir: str) -> str:
+    """cache/gemini_BTCUSD_1min_all_1d -> gemini_BTCUSD_1min_all_1d"""
+    return os.path.basename(cache_dir.rstrip(os.sep))
+
+
+def register_cache(manifest: dict, cache_dir: str, source: str=None, name: str=None) -> dict:
+    """Adds or refreshes the entry of a cache and returns it."""
+    entry = describe_cache(cache_dir, source)
+    manifest[name or get_dataset_name(cache_dir)] = entry
+    return entry
+
+
+def get_entry(name: str, manifest_path: str=MANIFEST_PATH) -> dict:
+    manifest = read_manifest(manifest_path)
+
+    if name not in manifest:
+        raise KeyError(f"{name} is not in {manifest_path}, known datasets: {sorted(manifest)}")
+    return manifest[name]
+
+
+def load_by_name(name: str,
+                 start_date: datetime.datetime=None,
+                 end_date: datetime.datetime=None,
+                 manifest_path: str=MANIFEST_PATH) -> pd.DataFrame:
+    """Reads the bars of a dataset of the manifest from start_date to end_date."""
+    return read_cache(get_entry(name, manifest_path)['cache_dir'], start_date, end_date)
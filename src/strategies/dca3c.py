@@ -1,11 +1,16 @@
 from __future__ import (absolute_import, division, print_function, unicode_literals)
 from dca        import DCA
+from dca_ladder import get_ladder_cache_info
+from ohlcv_store import load_ohlcv
+from ohlcv_resample import load_resampled
+from trade_bars     import load_trade_bars, load_resampled_trade_bars
+from spread_store   import join_spreads, get_spread_cache_dir
+from spread_broker  import SpreadBroker, SpreadData
 from backtrader_plotting         import Bokeh
 from backtrader_plotting.schemes import Blackly
 
 
 import backtrader as bt
-import pandas     as pd
 
 import datetime
 import os
@@ -17,9 +22,13 @@ TEN_THOUSAND          = 10000
 BTC_USD_1DAY_ALL      = "historical_data/gemini/BTCUSD/gemini_BTCUSD_day.csv"
 BTC_USD_2021_1MIN     = "historical_data/gemini/BTCUSD/gemini_BTCUSD_2021_1min.csv"
 BTC_USD_1MIN_ALL      = "historical_data/gemini/BTCUSD/gemini_BTCUSD_1min_all.csv"
+XBT_USD_TRADES        = "historical_data/kraken/XBTUSD/Kraken_XBTUSD_tradeprints.csv"
 
 BTCUSD_DECIMAL_PLACES = 5
 
+TRADE_BAR_SECONDS     = None  # ie. 5 to backtest on 5 second bars built from XBT_USD_TRADES instead of the minute bars
+SPREAD_FILLS          = False # fill market and stop orders at the ask/bid recorded by fetch_data.update_SPREAD_data(), see spread_broker.py
+
 p              = None
 period_results = dict()
 
@@ -103,31 +112,31 @@ class DCA3C(bt.Strategy):
         if self.is_first_safety_order:
             self.is_first_safety_order = False
 
-            self.take_profit_order = self.sell(price=self.dca.required_price_levels[0],
-                                               size=self.dca.total_quantity_levels[0],
+            self.take_profit_order = self.sell(price=self.dca.cursor.current_required_price,
+                                               size=self.dca.cursor.current_total_quantity,
                                                trailpercent=self.params.trail_percent,
-                                               plimit=self.dca.required_price_levels[0],
+                                               plimit=self.dca.cursor.current_required_price,
                                                exectype=bt.Order.StopTrailLimit)
             
-            self.dca.remove_top_safety_order()
+            self.dca.cursor.advance()
 
-            safety_order = self.buy(price=self.dca.price_levels[0],
-                                    size=self.dca.safety_order_quantity_levels[0],
+            safety_order = self.buy(price=self.dca.cursor.current_price,
+                                    size=self.dca.cursor.current_quantity,
                                     exectype=bt.Order.Limit,
                                     oco=self.take_profit_order) # oco = One Cancel Others
         else:
-            self.take_profit_order = self.sell(price=self.dca.required_price_levels[0],
-                                               size=self.dca.total_quantity_levels[0],
+            self.take_profit_order = self.sell(price=self.dca.cursor.current_required_price,
+                                               size=self.dca.cursor.current_total_quantity,
                                                trailpercent=self.params.trail_percent,
-                                               plimit=self.dca.required_price_levels[0],
+                                               plimit=self.dca.cursor.current_required_price,
                                                exectype=bt.Order.StopTrailLimit)
 
-            self.dca.remove_top_safety_order()
+            self.dca.cursor.advance()
 
             # check if we have placed all safety orders
-            if len(self.dca.price_levels) > 0:
-                safety_order = self.buy(price=self.dca.price_levels[0],
-                                        size=self.dca.safety_order_quantity_levels[0],
+            if self.dca.cursor.remaining > 0:
+                safety_order = self.buy(price=self.dca.cursor.current_price,
+                                        size=self.dca.cursor.current_quantity,
                                         exectype=bt.Order.Limit,
                                         oco=self.take_profit_order) # oco = One Cancel Others
 
@@ -176,8 +185,8 @@ class DCA3C(bt.Strategy):
 
                     """instead of submitting the takeprofit and all safety orders at a single time,
                     submit one safety order and one take profit order until one of them is canceled!"""
-                    safety_order = self.buy(price=self.dca.price_levels[0],
-                                                size=self.dca.safety_order_quantity_levels[0],
+                    safety_order = self.buy(price=self.dca.cursor.current_price,
+                                                size=self.dca.cursor.current_quantity,
                                                 exectype=bt.Order.Limit,
                                                 oco=self.take_profit_order) # oco = One Cancel Others
 
@@ -280,6 +289,7 @@ class DCA3C(bt.Strategy):
         profit           = self.money_format(round(profit, 2))
         self.start_value = self.money_format(round(self.start_value, 2))
         total_value      = self.money_format(round(total_value, 2))
+        cache_info       = get_ladder_cache_info()
 
         print("\n\n^^^^ FINISHED BACKTESTING ^^^^^")
         print("##########################################")
@@ -301,6 +311,7 @@ class DCA3C(bt.Strategy):
         print(f"ROI:                   {roi}")
         print(f"Start Portfolio Value: {self.start_value}")
         print(f"Final Portfolio Value: {total_value}")
+        print(f"Ladder cache:          {cache_info.hits} hits, {cache_info.misses} misses")
         print("##########################################")
         
         period_results[p] = roi
@@ -370,29 +381,36 @@ if __name__ == '__main__':
     for period in range(0, 1): # PERIOD 1-10
         start_date, end_date = get_period(period)
 
-        start_date_str = start_date.strftime("%Y-%m-%d %H:%M:%S")
-        end_date_str   = end_date.strftime(  "%Y-%m-%d %H:%M:%S")
+        # to improve start up speed, only read the months of the testing timeframe
+        # the day bars are resampled from the same bars that drive the strategy
+        if TRADE_BAR_SECONDS is None:
+            df                     = load_ohlcv(BTC_USD_1MIN_ALL, start_date, end_date, decimal_places=BTCUSD_DECIMAL_PLACES)
+            day_df                 = load_resampled(BTC_USD_1MIN_ALL, '1d', start_date, end_date, decimal_places=BTCUSD_DECIMAL_PLACES)
+            timeframe, compression = bt.TimeFrame.Minutes, 1
+        else:
+            df                     = load_trade_bars(XBT_USD_TRADES, 'time', TRADE_BAR_SECONDS, start_date, end_date, decimal_places=BTCUSD_DECIMAL_PLACES)
+            day_df                 = load_resampled_trade_bars(XBT_USD_TRADES, TRADE_BAR_SECONDS, '1d', start_date, end_date, decimal_places=BTCUSD_DECIMAL_PLACES)
+            timeframe, compression = bt.TimeFrame.Seconds, TRADE_BAR_SECONDS
 
-        df = pd.read_csv(BTC_USD_1MIN_ALL, usecols=['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume'], skiprows=1) # read in the data
-        df = df[::-1] # reverse the data
+        print(df)
 
-        # to improve start up speed, drop all data outside of testing timeframe
-        df = df.drop(df[df['Date'] < start_date_str].index)
-        df = df.drop(df[df['Date'] > end_date_str].index)
+        if SPREAD_FILLS:
+            data = SpreadData(dataname=join_spreads(df, get_spread_cache_dir('XBTUSD'), max_age=60), timeframe=timeframe, compression=compression, fromdate=start_date, todate=end_date)
+        else:
+            data = bt.feeds.PandasData(dataname=df, timeframe=timeframe, compression=compression, fromdate=start_date, todate=end_date)
 
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-        df.set_index('Date', inplace=True)
+        day_data = bt.feeds.PandasData(dataname=day_df, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date) # pre-resampled daily bars
 
-        print(df)
+        cerebro = bt.Cerebro()
 
-        data = bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+        if SPREAD_FILLS:
+            cerebro.broker = SpreadBroker()
 
-        cerebro = bt.Cerebro()
         cerebro.broker.set_cash(TEN_THOUSAND)
         cerebro.broker.setcommission(commission=0.001)  # 0.1% of the operation value
 
         cerebro.adddata(data, name='BTCUSD_MINUTE') # adding a name while using bokeh will avoid plotting error
-        cerebro.resampledata(data, timeframe=bt.TimeFrame.Days, compression=1, name="BTCUSD_DAY")
+        cerebro.adddata(day_data, name="BTCUSD_DAY")
         
         cerebro.addstrategy(DCA3C)
 
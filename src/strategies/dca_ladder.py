@@ -0,0 +1,361 @@
+"""dca_ladder.py - the safety order ladder of a DCA deal computed with numpy.
+
+Every level of the ladder follows from the previous one by a constant factor (the step and volume scales)
+or by a running sum, so the whole ladder is a handful of cumprod/cumsum calls, O(n) with no python loop:
+
+    step      = price_deviation * step_scale^i            (cumprod)
+    deviation = step_0 + ... + step_i                     (cumsum)
+    quantity  = safety_order_size * volume_scale^i        (cumprod)
+    totals    = base order + quantity_0 + ... + quantity_i (cumsum)
+
+The sums are taken in the same order as the original loops of DCA, so the levels are identical to them.
+compute_ladders() runs the same kernel over arrays of configs at once (configs x levels), for the optimizer.
+
+Within a backtest only the entry price and the order sizes change from deal to deal. get_ladder() keeps the ladder
+of an entry price of $1 and a first safety order of 1 (get_unit_ladder(), LRU cached on the settings) and rescales it
+for every deal, see get_ladder_cache_info() for the hits and misses.
+
+A Ladder holds the levels of a deal read only and a LadderCursor walks it as the safety orders fill,
+advancing is O(1) and any number of cursors (simulated deals) can share one ladder.
+
+    cursor = LadderCursor(Ladder(get_ladder(...)))
+    cursor.current_price, cursor.current_quantity
+    cursor.advance()
+
+    ladder = compute_ladder(36901.57, 1.0, 7, 2.5, 1.56, 1.3, base_order_size_usd=10, safety_order_size_usd=10)
+    ladder['required_price_levels'][0]
+
+"""
+
+import functools
+
+import numpy as np
+
+
+SOLVE_TOLERANCE_USD = 0.01 # most usd solve_safety_order_size_usd() leaves unused
+LADDER_CACHE_SIZE   = 256  # unit ladders kept by get_unit_ladder()
+
+LADDER_COLUMNS = ('deviation_percent_levels',
+                  'price_levels',
+                  'safety_order_quantity_levels',
+                  'safety_order_quantity_levels_usd',
+                  'total_quantity_levels',
+                  'total_quantity_levels_usd',
+                  'weighted_average_price_levels',
+                  'required_price_levels',
+                  'required_change_percent_levels',
+                  'profit_levels',
+                  'safety_order_roi_levels')
+
+
+def get_scaled_levels(first, scale, levels: int) -> np.ndarray:
+    """first, first * scale, first * scale^2, ... multiplied one level at a time like the loops did.
+    first and scale may be arrays of configs, the levels are then along the last axis."""
+    first, scale     = np.broadcast_arrays(np.asarray(first, dtype=np.float64), np.asarray(scale, dtype=np.float64))
+    factors          = np.repeat(scale[..., None], levels, axis=-1)
+    factors[..., :1] = first[..., None]
+    return np.cumprod(factors, axis=-1)
+
+
+def get_running_totals(start, values: np.ndarray) -> np.ndarray:
+    """start + values[0], start + values[0] + values[1], ... along the last axis."""
+    start = np.broadcast_to(np.asarray(start, dtype=np.float64)[..., None], values.shape[:-1] + (1,))
+    return np.cumsum(np.concatenate((start, values), axis=-1), axis=-1)[..., 1:]
+
+
+def compute_levels(levels: int,
+                   entry_price_usd,
+                   target_profit_percent,
+                   safety_order_volume_scale,
+                   safety_order_step_scale,
+                   safety_order_price_deviation_percent,
+                   base_order_size_usd=0.0,
+                   safety_order_size_usd=0.0,
+                   base_order_size=0.0,
+                   safety_order_size=0.0) -> dict[str, np.ndarray]:
+    """
+    The LADDER_COLUMNS of the first `levels` safety orders. The parameters are scalars or arrays of configs
+    (broadcast against each other), the levels of every config are along the last axis.
+
+    The orders are either sized in coin (base_order_size and safety_order_size) and their usd cost follows from
+    the price levels, or sized in usd (base_order_size_usd and safety_order_size_usd) and their quantity follows.
+    safety_order_roi_levels is the profit of every safety order in relation to the base order roi (target_profit_percent).
+
+    """
+
+    entry, target, volume_scale, step_scale, price_deviation, base_usd, safety_usd, base_size, safety_size = \
+        np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in (entry_price_usd, target_profit_percent,
+                                                                               safety_order_volume_scale, safety_order_step_scale,
+                                                                               safety_order_price_deviation_percent, base_order_size_usd,
+                                                                               safety_order_size_usd, base_order_size, safety_order_size)))
+    size_in_usd = (base_usd > 0) & (safety_usd > 0)
+    entry_level = entry[..., None]
+
+    deviation = np.cumsum(get_scaled_levels(price_deviation, step_scale, levels), axis=-1)
+    price     = entry_level - entry_level * (deviation / 100)
+
+    # usd sized orders
+    usd_quantity_usd = get_scaled_levels(safety_usd, volume_scale, levels)
+    usd_quantity     = usd_quantity_usd / price
+
+    # coin sized orders
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coin_quantity = get_scaled_levels(np.where(safety_size != 0, safety_size, safety_usd / entry), volume_scale, levels)
+    coin_quantity_usd = price * coin_quantity
+
+    quantity     = np.where(size_in_usd[..., None], usd_quantity,     coin_quantity)
+    quantity_usd = np.where(size_in_usd[..., None], usd_quantity_usd, coin_quantity_usd)
+
+    base_order_cost     = np.where(size_in_usd, base_usd, entry * base_size)
+    base_order_quantity = np.where(size_in_usd, base_order_cost / entry, base_size)
+    total_quantity      = get_running_totals(base_order_quantity, quantity)
+    total_quantity_usd  = get_running_totals(base_order_cost, quantity_usd)
+
+    weighted_average = get_running_totals(entry * (base_order_cost / entry), price * quantity) / total_quantity
+    required_price   = weighted_average + weighted_average * (target[..., None] / 100)
+    profit           = required_price * quantity - price * quantity
+
+    return {
+        'deviation_percent_levels':         deviation,
+        'price_levels':                     price,
+        'safety_order_quantity_levels':     quantity,
+        'safety_order_quantity_levels_usd': quantity_usd,
+        'total_quantity_levels':            total_quantity,
+        'total_quantity_levels_usd':        total_quantity_usd,
+        'weighted_average_price_levels':    weighted_average,
+        'required_price_levels':            required_price,
+        'required_change_percent_levels':   (required_price / price - 1) * 100,
+        'profit_levels':                    profit,
+        'safety_order_roi_levels':          (profit / target[..., None] - 1) * 100,
+    }
+
+
+def compute_ladder(entry_price_usd: float,
+                   target_profit_percent: float,
+                   safety_orders_max: int,
+                   safety_order_volume_scale: float,
+                   safety_order_step_scale: float,
+                   safety_order_price_deviation_percent: float,
+                   base_order_size_usd: float=0.0,
+                   safety_order_size_usd: float=0.0,
+                   base_order_size: float=0.0,
+                   safety_order_size: float=0.0) -> dict[str, np.ndarray]:
+    """Returns the LADDER_COLUMNS of the safety orders of one deal, one value per safety order."""
+    return compute_levels(max(int(safety_orders_max), 0),
+                          entry_price_usd,
+                          target_profit_percent,
+                          safety_order_volume_scale,
+                          safety_order_step_scale,
+                          safety_order_price_deviation_percent,
+                          base_order_size_usd,
+                          safety_order_size_usd,
+                          base_order_size,
+                          safety_order_size)
+
+
+def compute_ladders(entry_price_usd,
+                    target_profit_percent,
+                    safety_orders_max,
+                    safety_order_volume_scale,
+                    safety_order_step_scale,
+                    safety_order_price_deviation_percent,
+                    base_order_size_usd=0.0,
+                    safety_order_size_usd=0.0,
+                    base_order_size=0.0,
+                    safety_order_size=0.0) -> dict[str, np.ma.MaskedArray]:
+    """
+    The ladders of many configs in one vectorized call, for screening large grids of settings.
+
+    The parameters are arrays of configs (scalars are broadcast). Every column is a configs x levels masked array
+    as wide as the largest safety_orders_max, the levels past the safety_orders_max of a config are masked.
+
+        ladders = compute_ladders(36901.57, 1.0, grid['max'], grid['volume_scale'], grid['step_scale'], grid['deviation'],
+                                  base_order_size_usd=10, safety_order_size_usd=10)
+        ladders['total_quantity_levels_usd'].max(axis=1) # cash needed by every config
+
+    """
+
+    orders_max = np.asarray(safety_orders_max, dtype=np.int64)
+    params     = np.broadcast_arrays(np.asarray(entry_price_usd, dtype=np.float64), np.asarray(target_profit_percent, dtype=np.float64), orders_max,
+                                     *(np.asarray(value, dtype=np.float64) for value in (safety_order_volume_scale, safety_order_step_scale,
+                                                                                         safety_order_price_deviation_percent, base_order_size_usd,
+                                                                                         safety_order_size_usd, base_order_size, safety_order_size)))
+    entry, target, orders_max, *rest = (param.reshape(-1) for param in params)
+    levels = int(orders_max.max(initial=0))
+    mask   = np.arange(levels) >= orders_max[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        columns = compute_levels(levels, entry, target, *rest)
+    return {column: np.ma.masked_array(values, mask=mask) for column, values in columns.items()}
+
+
+@functools.lru_cache(maxsize=LADDER_CACHE_SIZE)
+def get_unit_ladder(size_in_usd: bool,
+                    safety_orders_max: int,
+                    safety_order_volume_scale: float,
+                    safety_order_step_scale: float,
+                    safety_order_price_deviation_percent: float) -> dict[str, np.ndarray]:
+    """
+    The parts of a ladder that do not depend on the entry price, the order sizes or the target profit:
+    the ladder of an entry price of $1 and a first safety order of 1 (usd or coin). The arrays are read only.
+
+    """
+
+    levels     = max(int(safety_orders_max), 0)
+    deviation  = np.cumsum(get_scaled_levels(safety_order_price_deviation_percent, safety_order_step_scale, levels))
+    price      = 1.0 - deviation / 100
+    scales     = get_scaled_levels(1.0, safety_order_volume_scale, levels)
+    quantity   = scales / price if size_in_usd else scales
+    ladder     = {
+        'deviation_percent_levels':         deviation,
+        'price_levels':                     price,
+        'safety_order_quantity_levels':     quantity,
+        'safety_order_quantity_levels_usd': scales if size_in_usd else price * scales,
+        'total_quantity_levels':            np.cumsum(quantity),
+        'total_quantity_levels_usd':        np.cumsum(scales if size_in_usd else price * scales),
+        'total_value_levels':               np.cumsum(price * quantity),
+    }
+
+    for values in ladder.values():
+        values.flags.writeable = False
+    return ladder
+
+
+def get_ladder_cache_info() -> tuple:
+    """Hits, misses and size of the unit ladder cache."""
+    return get_unit_ladder.cache_info()
+
+
+def get_ladder(entry_price_usd: float,
+               target_profit_percent: float,
+               safety_orders_max: int,
+               safety_order_volume_scale: float,
+               safety_order_step_scale: float,
+               safety_order_price_deviation_percent: float,
+               base_order_size_usd: float=0.0,
+               safety_order_size_usd: float=0.0,
+               base_order_size: float=0.0,
+               safety_order_size: float=0.0) -> dict[str, np.ndarray]:
+    """
+    Same as compute_ladder(), rescaled from the cached unit ladder of the settings.
+
+    Prices scale with the entry price, quantities with the first safety order quantity and usd amounts with its cost,
+    the base order is added on top. Equal to compute_ladder() up to float rounding.
+
+    """
+
+    size_in_usd = base_order_size_usd > 0 and safety_order_size_usd > 0
+    unit        = get_unit_ladder(size_in_usd, int(safety_orders_max), float(safety_order_volume_scale),
+                                  float(safety_order_step_scale), float(safety_order_price_deviation_percent))
+
+    if size_in_usd:
+        base_order_cost     = base_order_size_usd
+        base_order_quantity = base_order_cost / entry_price_usd
+        quantity_scale      = safety_order_size_usd / entry_price_usd
+        usd_scale           = safety_order_size_usd
+    else:
+        base_order_cost     = entry_price_usd * base_order_size
+        base_order_quantity = base_order_size
+        quantity_scale      = safety_order_size or safety_order_size_usd / entry_price_usd
+        usd_scale           = entry_price_usd * quantity_scale
+
+    price            = unit['price_levels'] * entry_price_usd
+    quantity         = unit['safety_order_quantity_levels'] * quantity_scale
+    total_quantity   = base_order_quantity + unit['total_quantity_levels'] * quantity_scale
+    weighted_average = (entry_price_usd * base_order_quantity + unit['total_value_levels'] * (entry_price_usd * quantity_scale)) / total_quantity
+    required_price   = weighted_average + weighted_average * (target_profit_percent / 100)
+    profit           = required_price * quantity - price * quantity
+
+    return {
+        'deviation_percent_levels':         unit['deviation_percent_levels'].copy(),
+        'price_levels':                     price,
+        'safety_order_quantity_levels':     quantity,
+        'safety_order_quantity_levels_usd': unit['safety_order_quantity_levels_usd'] * usd_scale,
+        'total_quantity_levels':            total_quantity,
+        'total_quantity_levels_usd':        base_order_cost + unit['total_quantity_levels_usd'] * usd_scale,
+        'weighted_average_price_levels':    weighted_average,
+        'required_price_levels':            required_price,
+        'required_change_percent_levels':   (required_price / price - 1) * 100,
+        'profit_levels':                    profit,
+        'safety_order_roi_levels':          (profit / target_profit_percent - 1) * 100,
+    }
+
+
+class Ladder():
+    """
+    The LADDER_COLUMNS of a deal as read only float64 arrays, walked with a LadderCursor.
+    The arrays of columns (ie. the ones get_ladder() returns) are frozen in place, not copied.
+
+    """
+
+    def __init__(self, columns: dict) -> None:
+        for column in LADDER_COLUMNS:
+            levels = np.asarray(columns[column], dtype=np.float64)
+            levels.setflags(write=False)
+            object.__setattr__(self, column, levels)
+        object.__setattr__(self, 'levels', len(self.price_levels))
+        return
+
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError("a Ladder is read only, walk it with a LadderCursor")
+
+
+class LadderCursor():
+    """
+    Position of a deal on a Ladder: the safety order that is placed next.
+    advance() moves to the following safety order in O(1), the ladder itself is never changed or copied.
+
+    """
+
+    def __init__(self, ladder: Ladder, position: int=0) -> None:
+        self.ladder:   Ladder = ladder
+        self.position: int    = position
+        return
+
+    @property
+    def remaining(self) -> int:
+        """Safety orders left, the current one included."""
+        return max(self.ladder.levels - self.position, 0)
+
+    @property
+    def current_price(self) -> float:
+        return float(self.ladder.price_levels[self.position])
+
+    @property
+    def current_quantity(self) -> float:
+        return float(self.ladder.safety_order_quantity_levels[self.position])
+
+    @property
+    def current_total_quantity(self) -> float:
+        """Quantity held once the current safety order filled, the base order included."""
+        return float(self.ladder.total_quantity_levels[self.position])
+
+    @property
+    def current_required_price(self) -> float:
+        """Take profit price once the current safety order filled."""
+        return float(self.ladder.required_price_levels[self.position])
+
+    def advance(self) -> None:
+        self.position += 1
+        return
+
+
+def solve_safety_order_size_usd(total_usd: float,
+                                base_order_size_usd: float,
+                                safety_orders_max: int,
+                                safety_order_volume_scale: float,
+                                tolerance_usd: float=SOLVE_TOLERANCE_USD) -> float:
+    """
+    The usd size of the first safety order whose ladder (base order included) costs total_usd,
+    less at most tolerance_usd so float rounding never takes it over.
+
+    The cost of the ladder is linear in that size: base_order_size_usd + size * (1 + scale + scale^2 + ...)
+    so it is solved directly, O(n) in the number of safety orders.
+
+    """
+
+    scale_sum = get_scaled_levels(1.0, safety_order_volume_scale, max(int(safety_orders_max), 0)).sum()
+
+    if scale_sum <= 0:
+        raise ValueError("a ladder without safety orders can not be sized to total_usd")
+    return (total_usd - base_order_size_usd - tolerance_usd) / scale_sum
@@ -0,0 +1,251 @@
+"""live_feed.py - backtrader live data feed built from streaming Kraken style OHLC and trade messages.
+
+A message source is any iterable of messages in the format of the Kraken websocket channels:
+
+    trade: [channel id, [[price, volume, time, side, order type, misc], ...], "trade",  "XBT/USD"]
+    ohlc:  [channel id, [time, etime, open, high, low, close, vwap, volume, count], "ohlc-1", "XBT/USD"]
+
+Event messages (dicts such as heartbeats) are skipped. FileReplaySource replays recorded messages from a json lines
+file and stands in for the websocket in tests and paper trading dry runs.
+
+The source runs on its own thread. Every message updates the open bar in O(1) (BarBuilder) and every bar that
+closes is pushed onto a queue. _load() blocks on that queue, so a bar reaches the strategy as soon as it closes
+instead of when the next poll comes around. In a quiet market the next bar can take a while to get its first message,
+so every qcheck without a bar _load() also closes the open bar once the clock of the source is close_delay seconds
+past its end. Sources without a clock() use the wall clock.
+
+    data = LiveKrakenData(source=FileReplaySource('recorded.jsonl'), bar_seconds=60, fromdate=start_date, todate=end_date)
+
+    cerebro.adddata(data, name='BTCUSD_MINUTE')
+    cerebro.resampledata(data, timeframe=bt.TimeFrame.Days, name='BTCUSD_DAY')
+
+"""
+
+import json
+import math
+import queue
+import threading
+import time
+
+import backtrader as bt
+
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL   = 719163 # bt.date2num(datetime.datetime(1970, 1, 1))
+
+_DONE = object() # pushed once the source is exhausted
+
+
+class BarBuilder():
+    """
+    Builds bars of bar_seconds out of trades or exchange OHLC updates with O(1) work per message.
+
+    A bar is only returned once it is closed, that is when the first message of a later bar arrives,
+    close_due() is called after the end of the bar or flush() at the end of the stream.
+    Bars are (open time, open, high, low, close, volume). Messages that arrive for a bar that was already closed are dropped.
+
+    """
+
+    def __init__(self, bar_seconds: int) -> None:
+        self.bar_seconds: int = bar_seconds
+        self.bar:         list | None = None
+        self.closed_end:  int = 0 # end of the last bar that was closed
+        return
+
+    def __close_bar(self, start: int) -> tuple | None:
+        """Starts the bar of start and returns the bar it replaces, if any."""
+        closed   = self.flush()
+        self.bar = [start, None, -math.inf, math.inf, None, 0.0]
+        return closed
+
+    def add_trade(self, epoch: float, price: float, volume: float) -> tuple | None:
+        start  = int(epoch // self.bar_seconds) * self.bar_seconds
+        closed = None
+
+        if start < self.closed_end:
+            return None # late trade of a bar that was closed by close_due()
+
+        if self.bar is None or start > self.bar[0]:
+            closed = self.__close_bar(start)
+
+        bar = self.bar
+        if bar[1] is None:
+            bar[1] = price
+        bar[2]  = max(bar[2], price)
+        bar[3]  = min(bar[3], price)
+        bar[4]  = price
+        bar[5] += volume
+        return closed
+
+    def add_ohlc(self, epoch: float, interval: int, open: float, high: float, low: float, close: float, volume: float) -> tuple | None:
+        """
+        Exchange OHLC updates carry the running values of the whole interval (in seconds), they replace the open bar.
+        The running values of an interval cannot be merged into longer bars or split into shorter ones,
+        so the interval has to be bar_seconds.
+
+        """
+
+        if interval != self.bar_seconds:
+            raise ValueError(f"ohlc updates of {interval} seconds cannot build bars of {self.bar_seconds} seconds")
+
+        start  = int(epoch // self.bar_seconds) * self.bar_seconds
+        closed = None
+
+        if start < self.closed_end:
+            return None
+
+        if self.bar is None or start > self.bar[0]:
+            closed = self.__close_bar(start)
+
+        self.bar[1:] = [open, high, low, close, volume]
+        return closed
+
+    def close_due(self, now: float) -> tuple | None:
+        """Closes the open bar when now is past its end."""
+        if self.bar is None or now < self.bar[0] + self.bar_seconds:
+            return None
+        return self.flush()
+
+    def flush(self) -> tuple | None:
+        closed = None
+
+        if self.bar is not None and self.bar[1] is not None:
+            closed          = tuple(self.bar)
+            self.closed_end = self.bar[0] + self.bar_seconds
+
+        self.bar = None
+        return closed
+
+
+class FileReplaySource():
+    """
+    Replays the messages of a json lines file, one message per line.
+    speed=None replays as fast as possible, speed=1.0 keeps the recorded gaps between the messages.
+
+    """
+
+    def __init__(self, path: str, speed: float=None) -> None:
+        self.path:  str   = path
+        self.speed: float = speed
+        self.last:  tuple = (0.0, time.time()) # (message time, wall time) of the last message replayed
+        return
+
+    def clock(self) -> float:
+        """The recorded time the replay is at. As fast as possible replays stay at the last message."""
+        stamp, wall_time = self.last
+        return stamp + (time.time() - wall_time) * self.speed if self.speed else stamp
+
+    def __iter__(self):
+        previous = None
+
+        with open(self.path) as file:
+            for line in file:
+                if not line.strip():
+                    continue
+
+                message = json.loads(line)
+                stamp   = get_message_time(message)
+
+                if self.speed and stamp is not None:
+                    if previous is not None and stamp > previous:
+                        time.sleep((stamp - previous) / self.speed)
+                    previous = stamp
+
+                if stamp is not None:
+                    self.last = (stamp, time.time())
+                yield message
+
+
+def get_message_time(message) -> float | None:
+    if not isinstance(message, list) or len(message) < 4:
+        return None
+    if message[2] == 'trade':
+        return float(message[1][-1][2])
+    if str(message[2]).startswith('ohlc'):
+        return float(message[1][0])
+    return None
+
+
+class LiveKrakenData(bt.feed.DataBase):
+    params = (
+        ('source',      None), # iterable of kraken style messages, see FileReplaySource
+        ('bar_seconds', 60),
+        ('qcheck',      0.5),  # seconds _load() waits for a bar before handing control back to cerebro
+        ('close_delay', 2.0),  # seconds after its end the open bar is closed without a message of the next bar
+    )
+
+    def islive(self) -> bool:
+        return True
+
+    def start(self) -> None:
+        super(LiveKrakenData, self).start()
+        self._bars    = queue.Queue()
+        self._builder = BarBuilder(self.p.bar_seconds)
+        self._lock    = threading.Lock() # the builder is shared with the timer in _load(), it pushes under the lock to keep the bars in order
+        self._clock   = getattr(self.p.source, 'clock', time.time)
+        self._error   = None
+        self._thread  = threading.Thread(target=self.__run, daemon=True)
+        self._thread.start()
+        return
+
+    def haslivedata(self) -> bool:
+        return not self._bars.empty()
+
+    def __push(self, bar: tuple | None) -> None:
+        if bar is not None:
+            self._bars.put(bar)
+        return
+
+    def __run(self) -> None:
+        try:
+            for message in self.p.source:
+                if not isinstance(message, list) or len(message) < 4:
+                    continue # heartbeats and other events
+
+                if message[2] == 'trade':
+                    with self._lock:
+                        for trade in message[1]:
+                            self.__push(self._builder.add_trade(float(trade[2]), float(trade[0]), float(trade[1])))
+
+                elif str(message[2]).startswith('ohlc'):
+                    # time, etime, open, high, low, close, vwap, volume, count
+                    fields   = message[1]
+                    interval = int(message[2].partition('-')[2] or 1) * 60 # ohlc-<minutes>
+
+                    with self._lock:
+                        self.__push(self._builder.add_ohlc(float(fields[1]) - interval, interval, float(fields[2]), float(fields[3]),
+                                                           float(fields[4]), float(fields[5]), float(fields[7])))
+        except Exception as e:
+            self._error = e # raised by _load() on the cerebro thread
+        finally:
+            with self._lock:
+                self.__push(self._builder.flush())
+            self._bars.put(_DONE)
+        return
+
+    def _load(self) -> bool | None:
+        try:
+            bar = self._bars.get(timeout=self.p.qcheck)
+        except queue.Empty:
+            with self._lock:
+                self.__push(self._builder.close_due(self._clock() - self.p.close_delay))
+            try:
+                bar = self._bars.get_nowait()
+            except queue.Empty:
+                return None # nothing closed yet, cerebro comes back later
+
+        if bar is _DONE:
+            if self._error is not None:
+                raise self._error
+            return False
+
+        start, open, high, low, close, volume = bar
+
+        self.lines.datetime[0]     = start / SECONDS_PER_DAY + EPOCH_ORDINAL
+        self.lines.open[0]         = open
+        self.lines.high[0]         = high
+        self.lines.low[0]          = low
+        self.lines.close[0]        = close
+        self.lines.volume[0]       = volume
+        self.lines.openinterest[0] = 0.0
+        return True
@@ -0,0 +1,119 @@
+"""memmap_feed.py - backtrader data feed that streams bars straight out of the columnar cache.
+
+bt.feeds.PandasData needs the whole history as a DataFrame in the memory of every backtest process.
+MemmapData maps the cached .npy columns read only instead. The pages come from the OS page cache,
+so several backtests running side by side on the same file share one physical copy of the data.
+
+    data     = MemmapData(dataname=BTC_USD_1MIN_ALL, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+    day_data = MemmapData(dataname=BTC_USD_1MIN_ALL, resample='1d', timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
+
+    cerebro = bt.Cerebro(preload=False) # without preload the bars are read from the map one at a time
+    cerebro.adddata(data,     name='BTCUSD_MINUTE')
+    cerebro.adddata(day_data, name='BTCUSD_DAY')
+
+"""
+
+import datetime
+import os
+
+import backtrader as bt
+import numpy      as np
+
+from ohlcv_store    import build_cache, read_cache_meta, get_fingerprint, get_price_scale, select_partitions, get_partition_dir, date_to_epoch, EPOCH_COLUMN
+from ohlcv_resample import build_resampled_cache
+
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL   = 719163 # bt.date2num(datetime.datetime(1970, 1, 1))
+
+
+class MemmapData(bt.feed.DataBase):
+    """Only the month partitions between fromdate and todate are mapped, one partition at a time."""
+
+    params = (
+        ('cache_dir',      None), # defaults to the cache directory of the csv passed as dataname
+        ('decimal_places', None), # cache schema, see ohlcv_store.get_schema()
+        ('resample',       None), # '1h', '4h' or '1d' streams the pre-resampled bars, see ohlcv_resample.py
+    )
+
+    def start(self) -> None:
+        super(MemmapData, self).start()
+
+        if self.p.resample is None:
+            self._cache_dir = build_cache(self.p.dataname, self.p.cache_dir, self.p.decimal_places)
+        else:
+            self._cache_dir = build_resampled_cache(self.p.dataname, self.p.resample, self.p.cache_dir, self.p.decimal_places)
+
+        meta             = read_cache_meta(self._cache_dir)
+        self.fingerprint = get_fingerprint(self._cache_dir) # content fingerprint of the streamed data
+        bar_seconds = meta.get('bar_seconds', 0)
+        fromdate    = self.p.fromdate
+
+        # resampled bars are stamped when they close (the next bucket opens), minute bars when they open
+        self._stamp_offset = bar_seconds
+
+        if fromdate is not None:
+            fromdate = fromdate - datetime.timedelta(seconds=bar_seconds)
+
+        self._scale      = get_price_scale(meta['schema'])
+        self._partitions = select_partitions(meta, fromdate, self.p.todate)
+
+        self._partition_idx = -1
+        self._idx           = 0
+        self._end           = 0
+        return
+
+    def stop(self) -> None:
+        # drop the maps so the file handles are released
+        self._epochs = self._open = self._high = self._low = self._close = self._volume = None
+        super(MemmapData, self).stop()
+        return
+
+    def __next_partition(self) -> bool:
+        self._partition_idx += 1
+
+        if self._partition_idx >= len(self._partitions):
+            return False
+
+        partition_dir = get_partition_dir(self._cache_dir, self._partitions[self._partition_idx])
+
+        self._epochs = self.__map(partition_dir, EPOCH_COLUMN)
+        self._open   = self.__map(partition_dir, 'Open')
+        self._high   = self.__map(partition_dir, 'High')
+        self._low    = self.__map(partition_dir, 'Low')
+        self._close  = self.__map(partition_dir, 'Close')
+        self._volume = self.__map(partition_dir, 'Volume')
+
+        # only walk the bars between fromdate and todate
+        self._idx = 0
+        self._end = len(self._epochs)
+
+        if self.p.fromdate is not None:
+            # a resampled bar that closes on fromdate holds no bars of the period, see ohlcv_resample.load_resampled()
+            side      = 'right' if self._stamp_offset else 'left'
+            self._idx = int(np.searchsorted(self._epochs, date_to_epoch(self.p.fromdate) - self._stamp_offset, side=side))
+        if self.p.todate is not None:
+            self._end = int(np.searchsorted(self._epochs, date_to_epoch(self.p.todate) - self._stamp_offset, side='right'))
+        return True
+
+    def _load(self) -> bool:
+        while self._idx >= self._end:
+            if not self.__next_partition():
+                # exhausted all rows
+                return False
+
+        i = self._idx
+        self._idx += 1
+
+        self.lines.datetime[0]     = (float(self._epochs[i]) + self._stamp_offset) / SECONDS_PER_DAY + EPOCH_ORDINAL
+        self.lines.open[0]         = float(self._open[i])  / self._scale
+        self.lines.high[0]         = float(self._high[i])  / self._scale
+        self.lines.low[0]          = float(self._low[i])   / self._scale
+        self.lines.close[0]        = float(self._close[i]) / self._scale
+        self.lines.volume[0]       = float(self._volume[i])
+        self.lines.openinterest[0] = 0.0
+        return True
+
+    @staticmethod
+    def __map(partition_dir: str, column: str) -> np.ndarray:
+        return np.load(os.path.join(partition_dir, f"{column}.npy"), mmap_mode='r')
@@ -0,0 +1,84 @@
+"""ohlcv_dataset.py - one in memory copy of an OHLCV file per process.
+
+The period loops in the strategies backtest the same file 10 times in a row.
+OHLCVDataset loads the file once and hands every period out as a slice of the same frame.
+The slice boundaries come from a binary search over the sorted epoch timestamps (TimeIndex).
+The data quality report of the file (see ohlcv_validate.py) is kept in OHLCVDataset.report."""
+
+import datetime
+import os
+
+import numpy  as np
+import pandas as pd
+
+from ohlcv_store    import load_ohlcv, build_cache, date_to_epoch
+from ohlcv_validate import validate_cache
+
+
+_datasets: dict = dict()
+
+
+class TimeIndex():
+    """
+    Sorted int64 epoch seconds of every bar.
+
+    Looking up the rows of a date range is two binary searches, O(log n),
+    instead of comparing every date string in the file against the range.
+
+    """
+
+    def __init__(self, epochs: np.ndarray) -> None:
+        epochs = np.asarray(epochs, dtype=np.int64)
+
+        if len(epochs) > 1 and np.any(epochs[1:] < epochs[:-1]):
+            raise ValueError("timestamps must be in ascending order")
+
+        self.epochs: np.ndarray = epochs
+        return
+
+    @classmethod
+    def from_datetime_index(cls, index: pd.DatetimeIndex) -> 'TimeIndex':
+        return cls(index.values.astype('datetime64[s]').view(np.int64))
+
+    @staticmethod
+    def to_epoch(date: datetime.datetime) -> int:
+        return date_to_epoch(date)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def get_offsets(self, start_date: datetime.datetime, end_date: datetime.datetime) -> tuple[int, int]:
+        """Returns the [start, end) row offsets of the bars from start_date to end_date (both included)."""
+        start = int(np.searchsorted(self.epochs, self.to_epoch(start_date), side='left'))
+        end   = int(np.searchsorted(self.epochs, self.to_epoch(end_date),   side='right'))
+        return start, max(start, end)
+
+
+class OHLCVDataset():
+    def __init__(self, csv_path: str, decimal_places: int=None) -> None:
+        self.csv_path:   str          = csv_path
+        self.df:         pd.DataFrame = load_ohlcv(csv_path, decimal_places=decimal_places)
+        self.symbol:     str          = self.df.attrs['symbol']
+        self.time_index: TimeIndex    = TimeIndex.from_datetime_index(self.df.index)
+        self.report:     dict         = validate_cache(build_cache(csv_path, decimal_places=decimal_places))
+        self.fingerprint: str         = self.df.attrs['fingerprint'] # content fingerprint, see ohlcv_store.get_fingerprint()
+        return
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def get_window(self, start_date: datetime.datetime, end_date: datetime.datetime) -> pd.DataFrame:
+        """Returns the bars from start_date to end_date (both included).
+        The window is a positional slice of the loaded frame rather than a filtered copy."""
+        start, end = self.time_index.get_offsets(start_date, end_date)
+        return self.df.iloc[start:end]
+
+
+def get_dataset(csv_path: str, decimal_places: int=None) -> OHLCVDataset:
+    """Returns the dataset for csv_path, loading it only the first time it is asked for in this process.
+    Pass the decimal places of the symbol (ie. BTCUSD_DECIMAL_PLACES) to keep the exact csv prices, see ohlcv_store.get_schema()."""
+    key = (os.path.abspath(csv_path), decimal_places)
+
+    if key not in _datasets:
+        _datasets[key] = OHLCVDataset(csv_path, decimal_places)
+    return _datasets[key]
@@ -0,0 +1,94 @@
+"""ohlcv_panel.py - loads a whole universe of daily stock files into one (symbols x days x fields) array.
+
+The files are read in parallel by a thread pool and aligned on a common trading calendar,
+so adding a ticker to a backtest is adding its symbol to a list.
+
+    panel = load_panel(['MSFT', 'GOOG', 'AAPL'])
+
+    for symbol in panel.symbols:
+        data = bt.feeds.PandasData(dataname=panel.get_frame(symbol), timeframe=bt.TimeFrame.Days)
+        cerebro.adddata(data, name=symbol)
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import os
+
+import numpy  as np
+import pandas as pd
+
+
+STOCKS_DIR   = "historical_data/stocks"
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class Panel():
+    def __init__(self, symbols: list[str], dates: np.ndarray, fields: list[str], values: np.ndarray) -> None:
+        self.symbols: list[str]  = symbols
+        self.dates:   np.ndarray = dates  # datetime64[D], the common trading calendar
+        self.fields:  list[str]  = fields
+        self.values:  np.ndarray = values # float64 (symbols x days x fields), NaN on days a symbol has no bar
+        return
+
+    def get_field(self, field: str) -> np.ndarray:
+        """(symbols x days) array of a single field, ie. every close."""
+        return self.values[:, :, self.fields.index(field)]
+
+    def get_frame(self, symbol: str) -> pd.DataFrame:
+        """The bars of one symbol without the days it has no bar, ready for bt.feeds.PandasData."""
+        values  = self.values[self.symbols.index(symbol)]
+        has_bar = ~np.isnan(values).all(axis=1)
+        index   = pd.DatetimeIndex(self.dates[has_bar].astype('datetime64[s]'), name='Date')
+        return pd.DataFrame(values[has_bar], index=index, columns=self.fields)
+
+
+def get_stock_path(symbol: str, directory: str=STOCKS_DIR) -> str:
+    return os.path.join(directory, f"{symbol}.csv")
+
+
+def read_stock_csv(path: str, fields: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Returns (dates as datetime64[D], float64 (days x fields)) in ascending order."""
+    df    = pd.read_csv(path, usecols=['Date'] + fields)
+    dates = pd.to_datetime(df['Date'].str[:10], format='%Y-%m-%d').to_numpy(dtype='datetime64[D]') # the time and utc offset are dropped
+    order = np.argsort(dates, kind='stable')
+    return dates[order], df[fields].to_numpy(dtype=np.float64)[order]
+
+
+def load_panel(symbols: list[str],
+               directory: str=STOCKS_DIR,
+               fields: list[str]=PANEL_FIELDS,
+               how: str='outer',
+               jobs: int=None) -> Panel:
+    """
+    Reads the csv of every symbol in parallel and aligns them on a common trading calendar.
+
+    how='outer' keeps every day any symbol traded (missing bars are NaN),
+    how='inner' keeps only the days every symbol traded.
+
+    """
+
+    if how not in ('outer', 'inner'):
+        raise ValueError("how must be 'outer' or 'inner'")
+
+    paths = [get_stock_path(symbol, directory) for symbol in symbols]
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        loaded = list(executor.map(lambda path: read_stock_csv(path, fields), paths))
+
+    if how == 'outer':
+        calendar = np.unique(np.concatenate([dates for dates, _ in loaded]))
+    else:
+        calendar = loaded[0][0]
+        for dates, _ in loaded[1:]:
+            calendar = np.intersect1d(calendar, dates)
+
+    values = np.full((len(symbols), len(calendar), len(fields)), np.nan)
+
+    for i, (dates, bars) in enumerate(loaded):
+        positions   = np.searchsorted(calendar, dates)
+        on_calendar = positions < len(calendar)
+        on_calendar[on_calendar] = calendar[positions[on_calendar]] == dates[on_calendar]
+        values[i, positions[on_calendar]] = bars[on_calendar]
+
+    return Panel(list(symbols), calendar, list(fields), values)
@@ -0,0 +1,140 @@
+"""ohlcv_resample.py - daily/hourly/4h bars built once from the minute cache.
+
+cerebro.resampledata() rebuilds the daily bars from millions of minute bars inside backtrader's python loop
+on every run. The bars are built here once with a vectorized group by (np.*.reduceat over the bars of every bucket)
+and saved as their own partitioned cache next to the minute cache (cache/<name>_1d/...).
+
+The Epoch column of a resampled cache is the time the bar opens. Fed into backtrader the bar is stamped with the
+open of the next bucket, so it arrives together with the first minute bar of the next day. That is when
+cerebro.resampledata() delivers it too: next() is called as often and the strategy places the same orders.
+
+    day_df   = load_resampled(BTC_USD_1MIN_ALL, '1d', start_date, end_date)
+    day_data = bt.feeds.PandasData(dataname=day_df, timeframe=bt.TimeFrame.Days, fromdate=start_date, todate=end_date)
+    cerebro.adddata(day_data, name="BTCUSD_DAY")
+
+"""
+
+import datetime
+import os
+
+import numpy  as np
+import pandas as pd
+
+from ohlcv_store import (build_cache, read_cache, read_cache_meta, read_column, write_cache, get_fingerprint,
+                         EPOCH_COLUMN, VOLUME_COLUMN, OHLCV_COLUMNS)
+
+
+RESAMPLE_VERSION = 2
+
+TIMEFRAME_SECONDS = {
+    '1h':  60 * 60,
+    '4h':  60 * 60 * 4,
+    '1d':  60 * 60 * 24,
+}
+
+
+def get_resampled_cache_dir(cache_dir: str, timeframe: str) -> str:
+    """cache/gemini_BTCUSD_1min_all -> cache/gemini_BTCUSD_1min_all_1d"""
+    return f"{cache_dir.rstrip(os.sep)}_{timeframe}"
+
+
+def resample_columns(columns: dict, bar_seconds: int) -> dict:
+    """
+    Groups ascending bars into buckets of bar_seconds aligned to UTC midnight.
+
+    Open is the first open of the bucket, close the last close, high/low the max/min and volume the sum.
+    Buckets without any bars are left out, the same as cerebro.resampledata().
+
+    """
+
+    epochs = columns[EPOCH_COLUMN]
+
+    if len(epochs) == 0:
+        return {name: values[:0] for name, values in columns.items()}
+
+    buckets = epochs - epochs % bar_seconds
+    starts  = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends    = np.concatenate((starts[1:], [len(epochs)]))
+
+    return {
+        EPOCH_COLUMN:  buckets[starts],
+        'Open':        columns['Open'][starts],
+        'High':        np.maximum.reduceat(columns['High'], starts),
+        'Low':         np.minimum.reduceat(columns['Low'],  starts),
+        'Close':       columns['Close'][ends - 1],
+        VOLUME_COLUMN: np.add.reduceat(columns[VOLUME_COLUMN].astype(np.float64), starts).astype(columns[VOLUME_COLUMN].dtype),
+    }
+
+
+def get_resample_key(minute_meta: dict, source_fingerprint: str, timeframe: str) -> dict:
+    """The resampled cache is only valid for the exact minute data it was built from (its fingerprint)."""
+    return {'version': RESAMPLE_VERSION, 'source': source_fingerprint, 'schema': minute_meta['schema'],
+            'timeframe': timeframe, 'bar_seconds': TIMEFRAME_SECONDS[timeframe]}
+
+
+def build_resampled_cache(csv_path: str, timeframe: str, cache_dir: str=None, decimal_places: int=None) -> str:
+    """
+    Builds the minute cache if needed, then the resampled cache unless an up to date one already exists.
+
+    Returns the resampled cache directory.
+
+    """
+
+    return resample_cache(build_cache(csv_path, cache_dir, decimal_places), timeframe)
+
+
+def resample_cache(source_dir: str, timeframe: str) -> str:
+    """
+    Builds the resampled cache of any bar cache (the minute bars, time bars of the trade prints, ...)
+    unless an up to date one already exists.
+
+    Returns the resampled cache directory.
+
+    """
+
+    if timeframe not in TIMEFRAME_SECONDS:
+        raise ValueError(f"timeframe must be one of {list(TIMEFRAME_SECONDS)}")
+
+    source_meta   = read_cache_meta(source_dir)
+    resampled_dir = get_resampled_cache_dir(source_dir, timeframe)
+    resample_key  = get_resample_key(source_meta, get_fingerprint(source_dir), timeframe)
+    meta          = read_cache_meta(resampled_dir)
+
+    if meta is None or any(meta.get(key) != value for key, value in resample_key.items()):
+        partitions = source_meta['partitions']
+        columns    = {column: read_column(source_dir, partitions, column) for column in [EPOCH_COLUMN] + OHLCV_COLUMNS}
+        columns[EPOCH_COLUMN] = columns[EPOCH_COLUMN].astype(np.int64, copy=False)
+
+        write_cache(source_meta['symbol'], resample_columns(columns, resample_key['bar_seconds']), resampled_dir, resample_key)
+    return resampled_dir
+
+
+def read_resampled(resampled_dir: str, timeframe: str, start_date: datetime.datetime=None, end_date: datetime.datetime=None) -> pd.DataFrame:
+    """
+    Returns the resampled bars that close after start_date and open before end_date.
+    The frame is indexed by the time each bar closes, the open of the next bucket, so it can be handed to
+    bt.feeds.PandasData as it is.
+
+    """
+
+    bar_seconds = TIMEFRAME_SECONDS[timeframe]
+
+    # a bar that opened before start_date but closes after it is still needed to cover start_date
+    open_date = start_date - datetime.timedelta(seconds=bar_seconds) if start_date is not None else None
+
+    df       = read_cache(resampled_dir, open_date, end_date)
+    df.index = (df.index + pd.Timedelta(seconds=bar_seconds)).rename(df.index.name)
+
+    if start_date is not None:
+        df = df[df.index > start_date]
+    return df
+
+
+def load_resampled(csv_path: str,
+                   timeframe: str,
+                   start_date: datetime.datetime=None,
+                   end_date: datetime.datetime=None,
+                   cache_dir: str=None,
+                   decimal_places: int=None) -> pd.DataFrame:
+    """Returns the resampled bars of the csv from start_date to end_date, see read_resampled()."""
+    return read_resampled(build_resampled_cache(csv_path, timeframe, cache_dir, decimal_places), timeframe, start_date, end_date)
@@ -0,0 +1,501 @@
+"""ohlcv_store.py - typed columnar cache for the exchange OHLCV csv files.
+
+Parsing the full gemini minute history is most of the start up cost of a backtest.
+The csv is parsed once and every column is saved as its own .npy file inside a cache directory.
+The cache is reused for as long as the source csv keeps the same size and modification time.
+
+The exchange files are stored newest bar first. ingest_csv() normalizes them once into ascending order
+with naive UTC epoch seconds, so loading the cache never has to reverse or re-parse the dates.
+
+Compact schema (per bar):
+    Epoch:                  int64 epoch seconds
+    Open, High, Low, Close: float32, or int64 scaled by 10**decimal_places when exact prices are needed
+    Volume:                 float32
+    Symbol:                 stored once in meta.json instead of once per bar
+
+The columns are partitioned by month (cache/<name>/<YYYY>/<MM>/<column>.npy) and meta.json lists the
+first and last epoch of every partition. Reading a date range only opens the partitions it overlaps.
+Caches that are updated incrementally (append_cache()) get a new segment per update inside the month directory,
+months with more than MAX_SEGMENTS segments are compacted into a single partition again.
+
+Every partition gets a row hash when it is written: every row is mixed with splitmix64 and the row hashes are summed.
+Sums add up, so meta.json keeps a fingerprint of the schema and the sum of the partition hashes (digested with xxh3 when
+xxhash is installed, blake2b otherwise) that only depends on the bars, not on how they are partitioned or compacted. Loaders hand it out (df.attrs['fingerprint']) so anything derived from the data
+can be cached under it and is invalidated when the data changes, see get_derived_key()."""
+
+import collections
+import datetime
+import hashlib
+import itertools
+import json
+import os
+
+import numpy  as np
+import pandas as pd
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+CACHE_VERSION  = 4
+CACHE_DIR_NAME = "cache"
+META_FILE      = "meta.json"
+
+DATE_COLUMN    = "Date"
+EPOCH_COLUMN   = "Epoch"
+SYMBOL_COLUMN  = "Symbol"
+PRICE_COLUMNS  = ['Open', 'High', 'Low', 'Close']
+VOLUME_COLUMN  = "Volume"
+OHLCV_COLUMNS  = PRICE_COLUMNS + [VOLUME_COLUMN]
+
+HASH_NAME      = "xxh3_128" if xxhash is not None else "blake2b"
+ROW_HASH_NAME  = f"rows-splitmix64-sum-{HASH_NAME}" # the salts and the final digest depend on HASH_NAME
+HASH_CHUNK     = 1 << 22 # bytes hashed at a time
+MAX_SEGMENTS   = 32      # segments a month collects before append_cache() compacts the cache
+
+
+def get_cache_dir(csv_path: str) -> str:
+    """historical_data/gemini/BTCUSD/gemini_BTCUSD_day.csv -> historical_data/gemini/BTCUSD/cache/gemini_BTCUSD_day"""
+    directory, filename = os.path.split(csv_path)
+    return os.path.join(directory, CACHE_DIR_NAME, os.path.splitext(filename)[0])
+
+
+def get_source_key(csv_path: str, schema: dict) -> dict:
+    """The cache is only valid for the exact csv file and schema it was built with."""
+    stat = os.stat(csv_path)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'schema': schema}
+
+
+def get_schema(decimal_places: int=None) -> dict:
+    """float32 prices by default. Passing the decimal places of the symbol (ie. BTCUSD_DECIMAL_PLACES)
+    stores the prices as exact scaled int64 instead."""
+    if decimal_places is None:
+        return {'price': 'float32', 'volume': 'float32'}
+    return {'price': 'int64', 'decimal_places': decimal_places, 'volume': 'float32'}
+
+
+def encode_prices(prices: np.ndarray, schema: dict) -> np.ndarray:
+    if schema['price'] == 'int64':
+        return np.round(prices * 10**schema['decimal_places']).astype(np.int64)
+    return prices.astype(np.float32)
+
+
+def decode_prices(prices: np.ndarray, schema: dict) -> np.ndarray:
+    if schema['price'] == 'int64':
+        return prices / 10**schema['decimal_places']
+    return prices
+
+
+def get_price_scale(schema: dict) -> int:
+    """Stored price / scale = price"""
+    return 10**schema['decimal_places'] if schema['price'] == 'int64' else 1
+
+
+def read_gemini_csv(csv_path: str) -> pd.DataFrame:
+    """Reads a cryptodatadownload csv (banner line, newest bar first) as it is stored in the file."""
+    return pd.read_csv(csv_path, usecols=[DATE_COLUMN, SYMBOL_COLUMN] + OHLCV_COLUMNS, skiprows=1)
+
+
+def date_to_epoch(date: datetime.datetime) -> int:
+    return int(np.datetime64(date, 's').astype(np.int64))
+
+
+def to_epoch_seconds(dates: pd.Series) -> np.ndarray:
+    """Date strings -> naive UTC int64 epoch seconds."""
+    dates = pd.to_datetime(dates, format='ISO8601')
+
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    return dates.to_numpy(dtype='datetime64[s]').view(np.int64)
+
+
+def validate_ascending(epochs: np.ndarray, csv_path: str) -> None:
+    if len(epochs) < 2:
+        return
+
+    backwards = np.flatnonzero(epochs[1:] < epochs[:-1])
+
+    if len(backwards) > 0:
+        raise ValueError(f"{csv_path}: {len(backwards)} bars are out of order, first one at row {backwards[0] + 1}")
+    return
+
+
+def ingest_csv(csv_path: str, schema: dict=None) -> tuple[str, dict]:
+    """
+    Reads the csv into typed columns in ascending time order and returns (symbol, columns).
+
+    Files stored newest bar first are reversed, files already in ascending order are kept as they are.
+    Any bar that is older than the one before it after that raises a ValueError.
+
+    """
+
+    schema  = schema or get_schema()
+    df      = read_gemini_csv(csv_path)
+    symbols = df[SYMBOL_COLUMN].unique()
+
+    if len(symbols) > 1:
+        raise ValueError(f"{csv_path}: expected a single symbol, found {list(symbols)}")
+
+    epochs  = to_epoch_seconds(df[DATE_COLUMN])
+    columns = {EPOCH_COLUMN: epochs}
+
+    for column in PRICE_COLUMNS:
+        columns[column] = encode_prices(df[column].to_numpy(dtype=np.float64), schema)
+
+    columns[VOLUME_COLUMN] = df[VOLUME_COLUMN].to_numpy(dtype=schema['volume'])
+
+    if len(epochs) > 1 and epochs[0] > epochs[-1]:
+        columns = {name: values[::-1] for name, values in columns.items()}
+
+    validate_ascending(columns[EPOCH_COLUMN], csv_path)
+
+    symbol = str(symbols[0]) if len(symbols) == 1 else None
+    return symbol, columns
+
+
+def new_hasher():
+    return xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+
+
+def get_column_salts(name: str, dtype: np.dtype) -> np.ndarray:
+    """Two 64 bit salts per column name and dtype, one per hash lane."""
+    hasher = new_hasher()
+    hasher.update(f"{name}:{dtype.str}".encode())
+    return np.frombuffer(hasher.digest()[:16], dtype=np.uint64).copy()
+
+
+def mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer, uint64 in and out (wraps around on purpose)."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xbf58476d1ce4e5b9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94d049bb133111eb)
+    return values ^ (values >> np.uint64(31))
+
+
+def hash_columns(columns: dict) -> str:
+    """
+    Row hash of the columns: every row (its epoch and values) is mixed into two 64 bit lanes and the lanes are summed.
+    The sum does not depend on how the rows are split, so the hashes of partitions add up to the hash of the whole cache
+    however it is partitioned, segmented or compacted. The rows are hashed in chunks so maps are never read whole.
+    The sum also ignores the order of the rows, which is only safe because the order is checked separately
+    (validate_ascending() on ingest, validate_columns() on the cache).
+
+    """
+
+    names  = sorted(columns)
+    salts  = {name: get_column_salts(name, columns[name].dtype) for name in names}
+    rows   = len(columns[EPOCH_COLUMN])
+    chunk  = HASH_CHUNK // 8
+    totals = np.zeros(2, dtype=np.uint64)
+
+    for start in range(0, rows, chunk):
+        bits = {name: np.ascontiguousarray(columns[name][start:start + chunk]) for name in names}
+        bits = {name: values.view(f"u{values.dtype.itemsize}").astype(np.uint64) for name, values in bits.items()}
+
+        for lane in range(2):
+            row_hashes = np.zeros(len(bits[EPOCH_COLUMN]), dtype=np.uint64)
+
+            for name in names:
+                row_hashes = mix64(row_hashes + mix64(bits[name] ^ salts[name][lane]))
+            totals[lane] += np.add.reduce(row_hashes, dtype=np.uint64)
+    return f"{int(totals[0]):016x}{int(totals[1]):016x}"
+
+
+def add_hashes(hashes: list[str]) -> str:
+    """Row hash of the concatenated partitions, from their row hashes."""
+    totals = np.zeros(2, dtype=np.uint64)
+
+    for value in hashes:
+        totals += np.array([int(value[:16], 16), int(value[16:], 16)], dtype=np.uint64)
+    return f"{int(totals[0]):016x}{int(totals[1]):016x}"
+
+
+def hash_partition(cache_dir: str, partition: dict) -> str:
+    """Re-hashes the files of a partition as they are on disk."""
+    partition_dir = get_partition_dir(cache_dir, partition)
+    return hash_columns({filename[:-len('.npy')]: np.load(os.path.join(partition_dir, filename), mmap_mode='r')
+                         for filename in os.listdir(partition_dir) if filename.endswith('.npy')})
+
+
+def get_cache_fingerprint(schema: dict, partitions: list[dict]) -> str:
+    hasher = new_hasher()
+    hasher.update(json.dumps(schema, sort_keys=True).encode())
+    hasher.update(add_hashes([partition['hash'] for partition in partitions]).encode())
+    return f"{ROW_HASH_NAME}:{hasher.hexdigest()}"
+
+
+def get_fingerprint(cache_dir: str) -> str:
+    """
+    Fingerprint of the cached data from meta.json, O(1).
+    Caches written before partitions were row hashed get their hashes computed and saved the first time.
+
+    """
+
+    meta = read_cache_meta(cache_dir)
+
+    if 'fingerprint' not in meta or not meta['fingerprint'].startswith(ROW_HASH_NAME + ":"):
+        for partition in meta['partitions']:
+            partition['hash'] = hash_partition(cache_dir, partition)
+
+        source_key = {key: value for key, value in meta.items() if key not in ('symbol', 'rows', 'partitions', 'fingerprint')}
+        write_meta(cache_dir, meta['symbol'], source_key, meta['partitions'])
+        meta = read_cache_meta(cache_dir)
+    return meta['fingerprint']
+
+
+def compute_fingerprint(cache_dir: str) -> str:
+    """
+    Fingerprint of the files as they are on disk, ignoring the hashes saved in meta.json.
+    It is a sum of splitmix64 row hashes (see hash_columns()), so it does not change when rows are reordered,
+    only validate_ascending() / validate_columns() catch that.
+
+    """
+
+    meta       = read_cache_meta(cache_dir)
+    partitions = [dict(partition, hash=hash_partition(cache_dir, partition)) for partition in meta['partitions']]
+    return get_cache_fingerprint(meta['schema'], partitions)
+
+
+def get_derived_key(fingerprint: str, **params) -> str:
+    """Key for anything computed from a dataset (resampled bars, indicators, backtest results):
+    the fingerprint of the data plus the parameters it was computed with."""
+    hasher = new_hasher()
+    hasher.update(fingerprint.encode())
+    hasher.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+def read_cache_meta(cache_dir: str) -> dict | None:
+    try:
+        with open(os.path.join(cache_dir, META_FILE)) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def get_partition_dir(cache_dir: str, partition: dict) -> str:
+    return os.path.join(cache_dir, partition['name'])
+
+
+def split_months(epochs: np.ndarray) -> list[tuple[str, int, int]]:
+    """Returns (YYYY/MM, start row, end row) for every month in the ascending epochs."""
+    if len(epochs) == 0:
+        return []
+
+    months     = epochs.view('datetime64[s]').astype('datetime64[M]')
+    boundaries = np.concatenate(([0], np.flatnonzero(months[1:] != months[:-1]) + 1, [len(epochs)]))
+
+    return [(str(months[start]).replace('-', '/'), int(start), int(end))
+            for start, end in zip(boundaries[:-1], boundaries[1:])]
+
+
+def write_partition(cache_dir: str, name: str, columns: dict) -> dict:
+    partition_dir = os.path.join(cache_dir, name)
+    os.makedirs(partition_dir, exist_ok=True)
+
+    for column, values in columns.items():
+        np.save(os.path.join(partition_dir, f"{column}.npy"), np.ascontiguousarray(values))
+
+    epochs = columns[EPOCH_COLUMN]
+    return {'name': name, 'start': int(epochs[0]), 'end': int(epochs[-1]), 'rows': len(epochs), 'hash': hash_columns(columns)}
+
+
+def write_cache(symbol: str, columns: dict, cache_dir: str, source_key: dict) -> None:
+    """Saves every column as a typed .npy file per month partition.
+    The meta file is written last so a half written cache is never picked up."""
+    os.makedirs(cache_dir, exist_ok=True)
+
+    if len(columns[EPOCH_COLUMN]) == 0:
+        write_meta(cache_dir, symbol, source_key, [])
+        return
+
+    partitions = []
+
+    for name, start, end in split_months(columns[EPOCH_COLUMN]):
+        partition = write_partition(cache_dir, name, {column: values[start:end] for column, values in columns.items()})
+        partitions.append(partition)
+
+    write_meta(cache_dir, symbol, source_key, partitions)
+    return
+
+
+def write_meta(cache_dir: str, symbol: str, source_key: dict, partitions: list[dict]) -> None:
+    meta                = dict(source_key)
+    meta['symbol']      = symbol
+    meta['rows']        = sum(partition['rows'] for partition in partitions)
+    meta['fingerprint'] = get_cache_fingerprint(source_key['schema'], partitions)
+    meta['partitions']  = partitions
+
+    tmp_path = os.path.join(cache_dir, META_FILE + ".tmp")
+    with open(tmp_path, 'w') as file:
+        json.dump(meta, file, indent=4)
+    os.replace(tmp_path, os.path.join(cache_dir, META_FILE))
+    return
+
+
+def get_last_epoch(cache_dir: str) -> int | None:
+    """Epoch of the newest stored bar, None when nothing is stored yet."""
+    meta = read_cache_meta(cache_dir)
+
+    if meta is None or len(meta['partitions']) == 0:
+        return None
+    return meta['partitions'][-1]['end']
+
+
+def append_cache(symbol: str, columns: dict, cache_dir: str, source_key: dict) -> int:
+    """
+    Appends the bars that are newer than the newest stored bar, older bars are dropped as already stored.
+
+    The new bars are written as segments of their months (cache/<name>/<YYYY>/<MM>/<first epoch>/) and only meta.json
+    is rewritten, so an update costs the same however long the stored history is. Once a month has more than
+    MAX_SEGMENTS segments the cache is compacted, see compact_cache().
+    Returns the number of bars appended.
+
+    """
+
+    meta = read_cache_meta(cache_dir)
+
+    if meta is not None and any(meta.get(key) != value for key, value in source_key.items()):
+        raise ValueError(f"{cache_dir}: the cache was built from a different source or schema")
+
+    partitions = meta['partitions'] if meta is not None else []
+
+    if len(partitions) > 0:
+        is_new  = columns[EPOCH_COLUMN] > partitions[-1]['end']
+        columns = {column: values[is_new] for column, values in columns.items()}
+
+    epochs = columns[EPOCH_COLUMN]
+
+    if len(epochs) == 0:
+        return 0
+
+    validate_ascending(epochs, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    for month, start, end in split_months(epochs):
+        segment = {column: values[start:end] for column, values in columns.items()}
+        partitions.append(write_partition(cache_dir, f"{month}/{epochs[start]}", segment))
+
+    write_meta(cache_dir, symbol, source_key, partitions)
+
+    segments = collections.Counter(partition['name'][:7] for partition in partitions)
+
+    if max(segments.values()) > MAX_SEGMENTS:
+        compact_cache(cache_dir)
+    return len(epochs)
+
+
+def compact_cache(cache_dir: str) -> None:
+    """Merges the partition and segments of every month that has more than one into a single partition.
+    The old files are only deleted once meta.json points to the merged partition."""
+    meta       = read_cache_meta(cache_dir)
+    partitions = []
+    replaced   = []
+
+    for month, group in itertools.groupby(meta['partitions'], key=lambda partition: partition['name'][:7]):
+        group = list(group)
+
+        if len(group) == 1:
+            partitions.append(group[0])
+            continue
+
+        names   = [filename[:-len('.npy')] for filename in os.listdir(get_partition_dir(cache_dir, group[0])) if filename.endswith('.npy')]
+        columns = {column: read_column(cache_dir, group, column) for column in names}
+
+        partitions.append(write_partition(cache_dir, f"{month}/{group[0]['start']}-{group[-1]['end']}", columns))
+        replaced.extend(group)
+
+    write_meta(cache_dir, meta['symbol'], {key: value for key, value in meta.items() if key not in ('symbol', 'rows', 'partitions', 'fingerprint')}, partitions)
+
+    for partition in replaced:
+        partition_dir = get_partition_dir(cache_dir, partition)
+
+        for filename in os.listdir(partition_dir):
+            if filename.endswith('.npy'):
+                os.remove(os.path.join(partition_dir, filename))
+        if len(os.listdir(partition_dir)) == 0:
+            os.rmdir(partition_dir)
+    return
+
+
+def select_partitions(meta: dict, start_date: datetime.datetime=None, end_date: datetime.datetime=None) -> list[dict]:
+    """Partition pruning: only the partitions that overlap [start_date, end_date]."""
+    start = date_to_epoch(start_date) if start_date is not None else None
+    end   = date_to_epoch(end_date)   if end_date   is not None else None
+
+    return [partition for partition in meta['partitions']
+            if (start is None or partition['end'] >= start) and (end is None or partition['start'] <= end)]
+
+
+def read_column(cache_dir: str, partitions: list[dict], column: str, mmap_mode: str=None) -> np.ndarray:
+    arrays = [np.load(os.path.join(get_partition_dir(cache_dir, partition), f"{column}.npy"), mmap_mode=mmap_mode)
+              for partition in partitions]
+
+    if len(arrays) == 0:
+        return np.empty(0)
+    if len(arrays) == 1:
+        return arrays[0]
+    return np.concatenate(arrays)
+
+
+def read_cache(cache_dir: str, start_date: datetime.datetime=None, end_date: datetime.datetime=None) -> pd.DataFrame:
+    """Reads the bars from start_date to end_date (both included, the whole file by default).
+    The symbol of the file is kept in df.attrs['symbol'] and the fingerprint of the cache in df.attrs['fingerprint']."""
+    meta       = read_cache_meta(cache_dir)
+    partitions = select_partitions(meta, start_date, end_date)
+
+    epochs = read_column(cache_dir, partitions, EPOCH_COLUMN).astype(np.int64, copy=False)
+    start  = int(np.searchsorted(epochs, date_to_epoch(start_date), side='left'))  if start_date is not None else 0
+    end    = int(np.searchsorted(epochs, date_to_epoch(end_date),   side='right')) if end_date   is not None else len(epochs)
+    end    = max(start, end)
+
+    columns = dict()
+
+    for column in PRICE_COLUMNS:
+        columns[column] = decode_prices(read_column(cache_dir, partitions, column)[start:end], meta['schema'])
+
+    columns[VOLUME_COLUMN] = read_column(cache_dir, partitions, VOLUME_COLUMN)[start:end]
+
+    index = pd.DatetimeIndex(epochs[start:end].view('datetime64[s]'), name=DATE_COLUMN)
+
+    df                      = pd.DataFrame(columns, index=index)
+    df.attrs['symbol']      = meta['symbol']
+    df.attrs['fingerprint'] = get_fingerprint(cache_dir)
+    return df
+
+
+def build_cache(csv_path: str, cache_dir: str=None, decimal_places: int=None) -> str:
+    """
+    Converts the csv into the columnar cache unless an up to date cache already exists.
+    Replacing or editing the csv changes its size or modification time and the cache is rebuilt.
+
+    Returns the cache directory.
+
+    """
+
+    schema     = get_schema(decimal_places)
+    cache_dir  = cache_dir or get_cache_dir(csv_path)
+    source_key = get_source_key(csv_path, schema)
+    meta       = read_cache_meta(cache_dir)
+
+    if meta is None or any(meta.get(key) != value for key, value in source_key.items()):
+        write_cache(*ingest_csv(csv_path, schema), cache_dir, source_key)
+    return cache_dir
+
+
+def load_ohlcv(csv_path: str,
+               start_date: datetime.datetime=None,
+               end_date: datetime.datetime=None,
+               cache_dir: str=None,
+               decimal_places: int=None) -> pd.DataFrame:
+    """
+    Returns the csv as a frame indexed by date in ascending order, optionally only from start_date to end_date.
+    The first call converts the csv into the columnar cache, every call after that only reads the .npy files
+    of the months that are needed.
+
+    """
+
+    return read_cache(build_cache(csv_path, cache_dir, decimal_places), start_date, end_date)
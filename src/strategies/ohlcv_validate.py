@@ -0,0 +1,94 @@
+"""ohlcv_validate.py - vectorized data quality checks for the OHLCV caches.
+
+Minute crypto data has gaps and duplicate timestamps. Every check here is a single numpy pass over the
+epoch and OHLC columns, so the full minute history is checked in well under a second.
+The report is saved next to the cache (validation.json) under a key derived from the fingerprint of the data it was built from,
+later runs reuse it until the data changes.
+
+Report:
+    rows, bar_seconds
+    duplicates:      rows that have the same timestamp as the bar before them (time bars only)
+    backwards:       rows that are older than the bar before them
+    gaps:            [start epoch, end epoch, missing bars] for every hole larger than one bar
+    high_below_low:  rows where high < low
+    open_outside:    rows where open is not within [low, high]
+    close_outside:   rows where close is not within [low, high]
+
+"""
+
+import json
+import os
+
+import numpy as np
+
+from ohlcv_store import read_cache_meta, read_column, get_derived_key, get_fingerprint, EPOCH_COLUMN
+
+
+VALIDATION_VERSION = 1
+VALIDATION_FILE    = "validation.json"
+
+ROW_CHECKS = ['duplicates', 'backwards', 'high_below_low', 'open_outside', 'close_outside']
+
+
+def infer_bar_seconds(epochs: np.ndarray) -> int:
+    """The most common spacing is the bar size, the median is close enough and a lot cheaper."""
+    diffs = np.diff(epochs)
+    diffs = diffs[diffs > 0]
+    return int(np.median(diffs)) if len(diffs) > 0 else 0
+
+
+def validate_columns(columns: dict, bar_seconds: int=None, time_bars: bool=True) -> dict:
+    """Tick, volume and dollar bars (time_bars=False) have no fixed length: several of them can open in the same second
+    and the time between them is no gap, so only bars that go backwards are reported for their stamps."""
+    epochs = np.asarray(columns[EPOCH_COLUMN], dtype=np.int64)
+    high   = columns['High']
+    low    = columns['Low']
+
+    bar_seconds = (bar_seconds or infer_bar_seconds(epochs)) if time_bars else 0
+    diffs       = np.diff(epochs)
+    gap_rows    = np.flatnonzero(diffs > bar_seconds) + 1 if bar_seconds > 0 else np.empty(0, dtype=np.int64)
+
+    return {
+        'rows':           len(epochs),
+        'bar_seconds':    bar_seconds,
+        'duplicates':     (np.flatnonzero(diffs == 0) + 1).tolist() if time_bars else [],
+        'backwards':      (np.flatnonzero(diffs < 0) + 1).tolist(),
+        'gaps':           np.column_stack((epochs[gap_rows - 1], epochs[gap_rows], diffs[gap_rows - 1] // bar_seconds - 1)).tolist(),
+        'high_below_low': np.flatnonzero(high < low).tolist(),
+        'open_outside':   np.flatnonzero((columns['Open']  < low) | (columns['Open']  > high)).tolist(),
+        'close_outside':  np.flatnonzero((columns['Close'] < low) | (columns['Close'] > high)).tolist(),
+    }
+
+
+def validate_cache(cache_dir: str, bar_seconds: int=None) -> dict:
+    """Returns the validation report of a cache, from validation.json when it was built from the same data."""
+    meta      = read_cache_meta(cache_dir)
+    time_bars = meta.get('bar_type', 'time') == 'time' # see trade_bars.py
+    key       = get_derived_key(get_fingerprint(cache_dir), validation_version=VALIDATION_VERSION, bar_seconds=bar_seconds, time_bars=time_bars)
+    file_path = os.path.join(cache_dir, VALIDATION_FILE)
+
+    try:
+        with open(file_path) as file:
+            saved = json.load(file)
+        if saved['key'] == key:
+            return saved['report']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    partitions = meta['partitions']
+    columns    = {column: read_column(cache_dir, partitions, column, mmap_mode='r')
+                  for column in [EPOCH_COLUMN, 'Open', 'High', 'Low', 'Close']}
+
+    report = validate_columns(columns, bar_seconds or meta.get('bar_seconds'), time_bars)
+
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump({'key': key, 'report': report}, file)
+    os.replace(tmp_path, file_path)
+    return report
+
+
+def format_report(report: dict) -> str:
+    missing = sum(gap[2] for gap in report['gaps'])
+    problems = ", ".join(f"{check}: {len(report[check])}" for check in ROW_CHECKS)
+    return f"{report['rows']:,} bars, {len(report['gaps']):,} gaps ({missing:,} missing bars), {problems}"
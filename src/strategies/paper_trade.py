@@ -0,0 +1,58 @@
+"""paper_trade.py - runs DCA3C or BHDCA on live bars (see live_feed.py) instead of the historical files.
+
+The strategies run unchanged, the minute bars come from LiveKrakenData and the daily bars are resampled from them.
+Any iterable of Kraken websocket messages can be passed as the source, FileReplaySource replays a recording.
+
+to run file,
+python paper_trade.py recorded.jsonl dca3c
+python paper_trade.py recorded.jsonl bhdca 1.0   # replay at the recorded speed
+
+"""
+
+from live_feed import LiveKrakenData, FileReplaySource
+
+import backtrader as bt
+
+import datetime
+import sys
+
+
+TEN_THOUSAND = 10000
+
+# the strategies measure the tested time period from the dates of the first feed
+LIVE_FROMDATE = datetime.datetime(1970, 1, 2)
+LIVE_TODATE   = datetime.datetime(2100, 1, 1)
+
+
+def get_strategy(name: str) -> type:
+    if name == 'bhdca':
+        import bhdca
+        bhdca.p = 'paper trading' # the strategies print the period they are testing
+        return bhdca.BHDCA
+
+    import dca3c
+    dca3c.p = 'paper trading'
+    return dca3c.DCA3C
+
+
+def paper_trade(source, strategy: type, bar_seconds: int=60) -> None:
+    data = LiveKrakenData(source=source, bar_seconds=bar_seconds, timeframe=bt.TimeFrame.Minutes,
+                          fromdate=LIVE_FROMDATE, todate=LIVE_TODATE)
+
+    cerebro = bt.Cerebro()
+    cerebro.broker.set_cash(TEN_THOUSAND)
+    cerebro.broker.setcommission(commission=0.001)  # 0.1% of the operation value
+
+    cerebro.adddata(data, name='BTCUSD_MINUTE')
+    cerebro.resampledata(data, timeframe=bt.TimeFrame.Days, name='BTCUSD_DAY')
+    cerebro.addstrategy(strategy)
+    cerebro.run()
+    return
+
+
+if __name__ == '__main__':
+    path  = sys.argv[1]
+    name  = sys.argv[2] if len(sys.argv) > 2 else 'dca3c'
+    speed = float(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    paper_trade(FileReplaySource(path, speed), get_strategy(name))
@@ -4,7 +4,9 @@ from __future__ import (absolute_import, division, print_function, unicode_liter
 # from backtrader_plotting.schemes import Blackly
 # from pprint                      import pprint
 
-import pandas     as pd
+from ohlcv_dataset  import get_dataset
+from ohlcv_validate import format_report
+
 import backtrader as bt
 
 import datetime
@@ -217,22 +219,15 @@ def get_period(period: int) -> datetime:
 if __name__ == '__main__':
     os.system('cls')
 
+    dataset = get_dataset(BTC_USD_1DAY_ALL, BTCUSD_DECIMAL_PLACES) # read in the data once for every period
+    print(format_report(dataset.report))
+
     for period in range(1, 11): # PERIOD 1-10
         start_date, end_date = get_period(period)
         start_date -= datetime.timedelta(days=200) # time required to process the 200 day simple moving average
 
-        start_date_str = start_date.strftime("%Y-%m-%d %H:%M:%S")
-        end_date_str   = end_date.strftime(  "%Y-%m-%d %H:%M:%S")
-
-        df = pd.read_csv(BTC_USD_1DAY_ALL, usecols=['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume'], skiprows=1) # read in the data
-        df = df[::-1] # reverse the data
-
-        # to improve start up speed, drop all data outside of testing timeframe
-        df = df.drop(df[df['Date'] < start_date_str].index)
-        df = df.drop(df[df['Date'] > end_date_str].index)
-
-        df['Date'] = pd.to_datetime(df['Date']).dt.tz_localize(None)
-        df.set_index('Date', inplace=True)
+        # to improve start up speed, only hand the testing timeframe to backtrader
+        df = dataset.get_window(start_date, end_date)
 
         print(df)
 
@@ -0,0 +1,59 @@
+"""spread_broker.py - fills market and stop orders at the bid/ask instead of the bar price.
+
+Every strategy fills at bar prices with a flat commission, which ignores what crossing the spread costs.
+SpreadData carries the Spread column of spread_store.join_spreads() as an extra line and SpreadBroker moves
+market and stop fills by half of the spread in force at the fill: buys pay the ask, sells get the bid.
+Limit orders are filled at their limit as before, bars without a known spread fill at the bar price.
+
+    df   = join_spreads(load_ohlcv(BTC_USD_1MIN_ALL, start_date, end_date), get_spread_cache_dir('XBTUSD'), max_age=60)
+    data = SpreadData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date)
+
+    cerebro.broker = SpreadBroker()
+
+"""
+
+import math
+
+import backtrader as bt
+
+
+class SpreadData(bt.feeds.PandasData):
+    lines  = ('spread',)
+    params = (('spread', -1),) # -1 picks up the Spread column by name
+
+
+class SpreadBroker(bt.brokers.BackBroker):
+    def __init__(self) -> None:
+        super(SpreadBroker, self).__init__()
+        self._half_spread = 0.0
+        return
+
+    @staticmethod
+    def get_half_spread(data) -> float:
+        spread = data.spread[0] if hasattr(data.lines, 'spread') else float('nan')
+        return 0.0 if math.isnan(spread) else spread / 2
+
+    def _try_exec_market(self, order, popen, phigh, plow) -> None:
+        self._half_spread = self.get_half_spread(order.data)
+        try:
+            super(SpreadBroker, self)._try_exec_market(order, popen, phigh, plow)
+        finally:
+            self._half_spread = 0.0
+        return
+
+    def _try_exec_stop(self, order, popen, phigh, plow, pcreated, pclose) -> None:
+        self._half_spread = self.get_half_spread(order.data)
+        try:
+            super(SpreadBroker, self)._try_exec_stop(order, popen, phigh, plow, pcreated, pclose)
+        finally:
+            self._half_spread = 0.0
+        return
+
+    # the ask/bid are real prices even when they are outside the bar's high/low, so they are not capped
+    def _slip_up(self, pmax, price, doslip=True, lim=False):
+        price = super(SpreadBroker, self)._slip_up(pmax, price, doslip, lim)
+        return price + self._half_spread if price is not None else None
+
+    def _slip_down(self, pmin, price, doslip=True, lim=False):
+        price = super(SpreadBroker, self)._slip_down(pmin, price, doslip, lim)
+        return price - self._half_spread if price is not None else None
@@ -0,0 +1,99 @@
+"""spread_store.py - time indexed bid/ask quotes of the Kraken Spread endpoint (see fetch_data.update_SPREAD_data).
+
+The quotes are appended to a columnar cache (cache/Kraken_XBTUSD_spreads/...) like the OHLC bars,
+with the bid and ask stored in the price schema of the cache.
+
+join_spreads() attaches the quote that was in force at every bar (an as-of join): one np.searchsorted of all the
+bar stamps into the quote stamps, O(n log m) in C with no python loop, so it is cheap on the full minute history.
+
+    df = join_spreads(load_ohlcv(BTC_USD_1MIN_ALL, start_date, end_date), get_spread_cache_dir('XBTUSD'), max_age=60)
+
+"""
+
+import datetime
+
+import numpy  as np
+import pandas as pd
+
+from ohlcv_store import (append_cache, encode_prices, decode_prices, get_cache_dir, get_schema, read_cache_meta, read_column,
+                         select_partitions, CACHE_VERSION, EPOCH_COLUMN)
+
+
+def get_spread_cache_dir(symbol: str) -> str:
+    return get_cache_dir(f"Kraken_{symbol}_spreads.csv")
+
+
+def get_spread_source_key(symbol: str, schema: dict) -> dict:
+    return {'version': CACHE_VERSION, 'exchange': 'kraken', 'pair': symbol, 'endpoint': 'Spread', 'schema': schema}
+
+
+def append_spreads(symbol: str, quotes: dict, cache_dir: str=None, decimal_places: int=None) -> int:
+    """Appends the quotes newer than the newest stored one. quotes are the columns of kraken_parse.parse_spread().
+    Returns the number of quotes appended."""
+    schema  = get_schema(decimal_places)
+    columns = {EPOCH_COLUMN: quotes['time'], 'Bid': encode_prices(quotes['bid'], schema), 'Ask': encode_prices(quotes['ask'], schema)}
+    return append_cache(symbol, columns, cache_dir or get_spread_cache_dir(symbol), get_spread_source_key(symbol, schema))
+
+
+def read_spreads(cache_dir: str,
+                 start_date: datetime.datetime=None,
+                 end_date: datetime.datetime=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns (epochs, bid, ask) of the quotes up to end_date.
+    The partition before start_date is read as well, its last quote is still in force at start_date.
+    A pair without a spread cache has no quotes (empty arrays), so its bars have no known spread.
+
+    """
+
+    meta = read_cache_meta(cache_dir)
+
+    if meta is None:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+
+    partitions = select_partitions(meta, start_date, end_date)
+
+    if len(partitions) > 0:
+        first      = meta['partitions'].index(partitions[0])
+        partitions = meta['partitions'][max(0, first - 1):first] + partitions
+    elif start_date is not None:
+        partitions = select_partitions(meta, None, start_date)[-1:] # every quote is older than start_date
+
+    epochs = read_column(cache_dir, partitions, EPOCH_COLUMN).astype(np.int64, copy=False)
+    bid    = decode_prices(read_column(cache_dir, partitions, 'Bid'), meta['schema'])
+    ask    = decode_prices(read_column(cache_dir, partitions, 'Ask'), meta['schema'])
+    return epochs, bid, ask
+
+
+def asof_join(epochs: np.ndarray, quote_epochs: np.ndarray, values: list[np.ndarray], max_age: int=None) -> list[np.ndarray]:
+    """
+    For every epoch the value of the newest quote at or before it. Epochs before the first quote,
+    or whose newest quote is older than max_age seconds, get NaN.
+
+    """
+
+    if len(quote_epochs) == 0:
+        return [np.full(len(epochs), np.nan) for _ in values]
+
+    rows  = np.searchsorted(quote_epochs, epochs, side='right') - 1
+    found = rows >= 0
+    rows  = np.maximum(rows, 0)
+
+    if max_age is not None:
+        found &= epochs - quote_epochs[rows] <= max_age
+
+    return [np.where(found, np.asarray(value, dtype=np.float64)[rows], np.nan) for value in values]
+
+
+def join_spreads(df: pd.DataFrame, cache_dir: str, max_age: int=None) -> pd.DataFrame:
+    """Returns a copy of the bars with the Bid, Ask and Spread in force at every bar's stamp."""
+    epochs     = df.index.values.astype('datetime64[s]').view(np.int64)
+    start, end = (df.index[0].to_pydatetime(), df.index[-1].to_pydatetime()) if len(df) > 0 else (None, None)
+
+    quote_epochs, bid, ask = read_spreads(cache_dir, start, end)
+    bid, ask               = asof_join(epochs, quote_epochs, [bid, ask], max_age)
+
+    df           = df.copy()
+    df['Bid']    = bid
+    df['Ask']    = ask
+    df['Spread'] = ask - bid
+    return df
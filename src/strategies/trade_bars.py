@@ -0,0 +1,137 @@
+"""trade_bars.py - builds OHLCV bars out of the Kraken trade prints (see fetch_data.fetch_PRINTS_data).
+
+    time:   a bar every size seconds (1, 5, 60, ...), stamped with the second the bar opens
+    tick:   a bar every size trades
+    volume: a new bar once size coins have traded
+    dollar: a new bar once size dollars have traded
+
+Tick, volume and dollar bars are stamped with the second of their first trade, so several bars that open in one busy
+second share a stamp (ohlcv_validate.validate_cache() does not report those as duplicates).
+The bars are grouped in one vectorized pass (np.*.reduceat over the first trade of every bar) and saved as a
+columnar cache next to the trades csv (cache/Kraken_XBTUSD_tradeprints_time5/...), in the same format as the minute bars.
+
+    df   = load_trade_bars(XBT_USD_TRADES, 'time', 5, start_date, end_date)
+    data = bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Seconds, compression=5, fromdate=start_date, todate=end_date)
+
+    day_df = load_resampled_trade_bars(XBT_USD_TRADES, 5, '1d', start_date, end_date) # the day bars of the same trades
+
+"""
+
+import datetime
+
+import numpy  as np
+import pandas as pd
+
+from ohlcv_store    import (get_cache_dir, get_schema, get_source_key, encode_prices, read_cache, read_cache_meta, write_cache,
+                            EPOCH_COLUMN, VOLUME_COLUMN)
+from ohlcv_resample import read_resampled, resample_cache
+
+
+TRADE_BARS_VERSION = 3
+BAR_TYPES          = ['time', 'tick', 'volume', 'dollar']
+
+
+def get_trade_bars_cache_dir(csv_path: str, bar_type: str, size: float) -> str:
+    """Kraken_XBTUSD_tradeprints.csv, 'time', 5 -> cache/Kraken_XBTUSD_tradeprints_time5"""
+    return f"{get_cache_dir(csv_path)}_{bar_type}{np.format_float_positional(size, trim='-')}"
+
+
+def read_trades(csv_path: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (time, price, volume) of every trade in ascending time order."""
+    df    = pd.read_csv(csv_path, usecols=['price', 'volume', 'time'], dtype=np.float64)
+    times = df['time'].to_numpy()
+    order = np.argsort(times, kind='stable')
+    return times[order], df['price'].to_numpy()[order], df['volume'].to_numpy()[order]
+
+
+def get_bar_ids(times: np.ndarray, prices: np.ndarray, volumes: np.ndarray, bar_type: str, size: float) -> np.ndarray:
+    """Non decreasing id of the bar every trade belongs to. A trade always goes to a single bar,
+    so a volume or dollar bar closes on the trade that crosses its size."""
+    if bar_type == 'time':
+        return np.floor(times / size).astype(np.int64)
+    if bar_type == 'tick':
+        return np.arange(len(times)) // int(size)
+    if bar_type == 'volume':
+        amounts = volumes
+    elif bar_type == 'dollar':
+        amounts = prices * volumes
+    else:
+        raise ValueError(f"bar_type must be one of {BAR_TYPES}")
+
+    traded_before = np.cumsum(amounts) - amounts
+    return np.floor(traded_before / size).astype(np.int64)
+
+
+def aggregate_trades(times: np.ndarray, prices: np.ndarray, volumes: np.ndarray, bar_type: str, size: float) -> dict:
+    """Returns the bars as float64 columns keyed like the cache (Epoch, Open, High, Low, Close, Volume)."""
+    if len(times) == 0:
+        return {EPOCH_COLUMN: np.empty(0, dtype=np.int64), 'Open': prices, 'High': prices, 'Low': prices, 'Close': prices, VOLUME_COLUMN: volumes}
+
+    ids    = get_bar_ids(times, prices, volumes, bar_type, size)
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    ends   = np.concatenate((starts[1:], [len(times)]))
+
+    if bar_type == 'time':
+        epochs = ids[starts] * int(size)
+    else:
+        epochs = np.floor(times[starts]).astype(np.int64)
+
+    return {
+        EPOCH_COLUMN:  epochs,
+        'Open':        prices[starts],
+        'High':        np.maximum.reduceat(prices, starts),
+        'Low':         np.minimum.reduceat(prices, starts),
+        'Close':       prices[ends - 1],
+        VOLUME_COLUMN: np.add.reduceat(volumes, starts),
+    }
+
+
+def build_trade_bars(csv_path: str, bar_type: str, size: float, cache_dir: str=None, decimal_places: int=None) -> str:
+    """
+    Builds the bars of the trades csv unless an up to date cache of them already exists.
+
+    Returns the cache directory.
+
+    """
+
+    if bar_type not in BAR_TYPES:
+        raise ValueError(f"bar_type must be one of {BAR_TYPES}")
+
+    schema     = get_schema(decimal_places)
+    cache_dir  = cache_dir or get_trade_bars_cache_dir(csv_path, bar_type, size)
+    source_key = get_source_key(csv_path, schema)
+    source_key.update({'bars_version': TRADE_BARS_VERSION, 'bar_type': bar_type, 'bar_size': size})
+    meta       = read_cache_meta(cache_dir)
+
+    if meta is None or any(meta.get(key) != value for key, value in source_key.items()):
+        bars = aggregate_trades(*read_trades(csv_path), bar_type, size)
+
+        for column in ['Open', 'High', 'Low', 'Close']:
+            bars[column] = encode_prices(bars[column], schema)
+        bars[VOLUME_COLUMN] = bars[VOLUME_COLUMN].astype(schema['volume'])
+
+        write_cache(None, bars, cache_dir, source_key)
+    return cache_dir
+
+
+def load_trade_bars(csv_path: str,
+                    bar_type: str,
+                    size: float,
+                    start_date: datetime.datetime=None,
+                    end_date: datetime.datetime=None,
+                    cache_dir: str=None,
+                    decimal_places: int=None) -> pd.DataFrame:
+    """Returns the bars from start_date to end_date as a frame ready for bt.feeds.PandasData."""
+    return read_cache(build_trade_bars(csv_path, bar_type, size, cache_dir, decimal_places), start_date, end_date)
+
+
+def load_resampled_trade_bars(csv_path: str,
+                              size: int,
+                              timeframe: str,
+                              start_date: datetime.datetime=None,
+                              end_date: datetime.datetime=None,
+                              cache_dir: str=None,
+                              decimal_places: int=None) -> pd.DataFrame:
+    """The time bars of size seconds resampled into '1h', '4h' or '1d' bars, see ohlcv_resample.read_resampled()."""
+    bars_dir = build_trade_bars(csv_path, 'time', size, cache_dir, decimal_places)
+    return read_resampled(resample_cache(bars_dir, timeframe), timeframe, start_date, end_date)
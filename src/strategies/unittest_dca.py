@@ -1,5 +1,8 @@
-from dca    import DCA
-from pprint import pprint
+import dca
+
+from dca        import DCA
+from dca_ladder import compute_ladder, compute_ladders, get_ladder, get_ladder_cache_info, LadderCursor, LADDER_COLUMNS
+from pprint     import pprint
 
 import pytest
 
@@ -47,16 +50,15 @@ class DCAScalp7():
     def round_everything(self) -> None:
         self.dca.base_order_size = round(self.dca.base_order_size, MAX_DECIMAL_PLACES)
 
-        for i in range(self.dca.safety_orders_max):
-            self.dca.deviation_percent_levels[i]         = round(self.dca.deviation_percent_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.price_levels[i]                     = round(self.dca.price_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.safety_order_quantity_levels[i]     = round(self.dca.safety_order_quantity_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.safety_order_quantity_levels_usd[i] = round(self.dca.safety_order_quantity_levels_usd[i], MAX_DECIMAL_PLACES)
-            self.dca.total_quantity_levels[i]            = round(self.dca.total_quantity_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.total_quantity_levels_usd[i]        = round(self.dca.total_quantity_levels_usd[i], MAX_DECIMAL_PLACES)
-            self.dca.weighted_average_price_levels[i]    = round(self.dca.weighted_average_price_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.required_price_levels[i]            = round(self.dca.required_price_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.required_change_percent_levels[i]   = round(self.dca.required_change_percent_levels[i], MAX_DECIMAL_PLACES)
+        self.dca.deviation_percent_levels         = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.deviation_percent_levels]
+        self.dca.price_levels                     = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.price_levels]
+        self.dca.safety_order_quantity_levels     = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.safety_order_quantity_levels]
+        self.dca.safety_order_quantity_levels_usd = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.safety_order_quantity_levels_usd]
+        self.dca.total_quantity_levels            = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.total_quantity_levels]
+        self.dca.total_quantity_levels_usd        = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.total_quantity_levels_usd]
+        self.dca.weighted_average_price_levels    = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.weighted_average_price_levels]
+        self.dca.required_price_levels            = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.required_price_levels]
+        self.dca.required_change_percent_levels   = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.required_change_percent_levels]
         return
 
 
@@ -93,16 +95,15 @@ class DCAScalp15():
     def round_everything(self) -> None:
         self.dca.base_order_size = round(self.dca.base_order_size, MAX_DECIMAL_PLACES)
 
-        for i in range(self.dca.safety_orders_max):
-            self.dca.deviation_percent_levels[i]         = round(self.dca.deviation_percent_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.price_levels[i]                     = round(self.dca.price_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.safety_order_quantity_levels[i]     = round(self.dca.safety_order_quantity_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.safety_order_quantity_levels_usd[i] = round(self.dca.safety_order_quantity_levels_usd[i], MAX_DECIMAL_PLACES)
-            self.dca.total_quantity_levels[i]            = round(self.dca.total_quantity_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.total_quantity_levels_usd[i]        = round(self.dca.total_quantity_levels_usd[i], MAX_DECIMAL_PLACES)
-            self.dca.weighted_average_price_levels[i]    = round(self.dca.weighted_average_price_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.required_price_levels[i]            = round(self.dca.required_price_levels[i], MAX_DECIMAL_PLACES)
-            self.dca.required_change_percent_levels[i]   = round(self.dca.required_change_percent_levels[i], MAX_DECIMAL_PLACES)
+        self.dca.deviation_percent_levels         = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.deviation_percent_levels]
+        self.dca.price_levels                     = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.price_levels]
+        self.dca.safety_order_quantity_levels     = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.safety_order_quantity_levels]
+        self.dca.safety_order_quantity_levels_usd = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.safety_order_quantity_levels_usd]
+        self.dca.total_quantity_levels            = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.total_quantity_levels]
+        self.dca.total_quantity_levels_usd        = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.total_quantity_levels_usd]
+        self.dca.weighted_average_price_levels    = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.weighted_average_price_levels]
+        self.dca.required_price_levels            = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.required_price_levels]
+        self.dca.required_change_percent_levels   = [round(level, MAX_DECIMAL_PLACES) for level in self.dca.required_change_percent_levels]
         return
 
 
@@ -404,3 +405,108 @@ def test_scalp15_required_change_percent() -> None:
     assert scalp15.dca.required_change_percent_levels[13] == 35.11469382
     assert scalp15.dca.required_change_percent_levels[14] == 47.65241426
     return
+
+
+
+#############################################################################################
+### Unit Tests - Ladder
+#############################################################################################
+
+def test_ladder_deviation_steps() -> None:
+    ladder = compute_ladder(100.0, 1.0, 5, 1.0, 2.0, 1.0, base_order_size=1, safety_order_size=1)
+    assert ladder['deviation_percent_levels'].tolist() == [1.0, 3.0, 7.0, 15.0, 31.0]
+    assert ladder['price_levels'].tolist()             == [99.0, 97.0, 93.0, 85.0, 69.0]
+    return
+
+def test_ladder_matches_dca() -> None:
+    dca    = DCAScalp15().dca
+    ladder = compute_ladder(2481.92, 1.0, 15, 1.2, 1.16, 1, base_order_size=2, safety_order_size=1)
+
+    for column in LADDER_COLUMNS:
+        assert [round(value, MAX_DECIMAL_PLACES) for value in ladder[column]] == \
+               [round(value, MAX_DECIMAL_PLACES) for value in getattr(dca, column)]
+    return
+
+def test_batch_ladders_match_single_ladders() -> None:
+    orders_max   = [7, 15, 3]
+    volume_scale = [2.5, 1.2, 1.0]
+    step_scale   = [1.56, 1.16, 2.0]
+    deviation    = [1.3, 1.0, 1.0]
+    ladders      = compute_ladders(2481.92, 1.0, orders_max, volume_scale, step_scale, deviation, base_order_size=2, safety_order_size=1)
+
+    assert ladders['price_levels'].shape == (3, 15)
+
+    for i in range(3):
+        ladder = compute_ladder(2481.92, 1.0, orders_max[i], volume_scale[i], step_scale[i], deviation[i], base_order_size=2, safety_order_size=1)
+
+        for column in LADDER_COLUMNS:
+            assert ladders[column][i].compressed().tolist() == ladder[column].tolist()
+    return
+
+def test_cached_ladder_is_rescaled_to_every_deal() -> None:
+    settings = (1.0, 15, 1.2, 1.16, 1)
+    hits     = get_ladder_cache_info().hits
+
+    for entry_price, base_order_size, safety_order_size in ((2481.92, 2, 1), (1733.5, 0.3, 0.5), (3120.0, 1, 4)):
+        ladder = get_ladder(entry_price, *settings, base_order_size=base_order_size, safety_order_size=safety_order_size)
+        exact  = compute_ladder(entry_price, *settings, base_order_size=base_order_size, safety_order_size=safety_order_size)
+
+        for column in LADDER_COLUMNS:
+            assert ladder[column] == pytest.approx(exact[column], rel=1e-12)
+
+    assert get_ladder_cache_info().hits >= hits + 2
+    return
+
+def test_cursor_walks_the_ladder() -> None:
+    dca    = DCAScalp7().dca
+    cursor = LadderCursor(dca.ladder)
+    other  = LadderCursor(dca.ladder)
+
+    for i in range(7):
+        assert cursor.remaining              == 7 - i
+        assert cursor.current_price          == pytest.approx(dca.price_levels[i], abs=1e-8)
+        assert cursor.current_quantity       == pytest.approx(dca.safety_order_quantity_levels[i], abs=1e-8)
+        assert cursor.current_total_quantity == pytest.approx(dca.total_quantity_levels[i], abs=1e-8)
+        assert cursor.current_required_price == pytest.approx(dca.required_price_levels[i], abs=1e-8)
+        cursor.advance()
+
+    assert cursor.remaining == 0
+    assert other.current_price == dca.ladder.price_levels[0] # the ladder is shared, not consumed
+
+    with pytest.raises(AttributeError):
+        dca.ladder.price_levels = ()
+    with pytest.raises(ValueError):
+        dca.ladder.price_levels[0] = 0.0
+    return
+
+def test_optimize_uses_all_of_total_usd() -> None:
+    dca = DCA(entry_price_usd=36901.57,
+              target_profit_percent=1.0,
+              safety_orders_max=7,
+              safety_orders_active_max=7,
+              safety_order_volume_scale=2.5,
+              safety_order_step_scale=1.56,
+              safety_order_price_deviation_percent=1.3,
+              base_order_size=0.0003,
+              safety_order_size=0.0003,
+              total_usd=10000)
+
+    assert 10000 - 0.01 <= dca.total_quantity_levels_usd[-1] < 10000
+    assert dca.safety_order_quantity_levels_usd[1] == pytest.approx(dca.safety_order_quantity_levels_usd[0] * 2.5)
+    return
+
+def test_optimize_raises_when_the_orders_cost_more_than_total_usd(monkeypatch) -> None:
+    monkeypatch.setattr(dca, 'solve_safety_order_size_usd', lambda total_usd, *args: total_usd)
+
+    with pytest.raises(ValueError):
+        DCA(entry_price_usd=36901.57,
+            target_profit_percent=1.0,
+            safety_orders_max=7,
+            safety_orders_active_max=7,
+            safety_order_volume_scale=2.5,
+            safety_order_step_scale=1.56,
+            safety_order_price_deviation_percent=1.3,
+            base_order_size=0.0003,
+            safety_order_size=0.0003,
+            total_usd=10000)
+    return
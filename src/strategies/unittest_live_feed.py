@@ -0,0 +1,116 @@
+from live_feed import BarBuilder, FileReplaySource, LiveKrakenData
+
+import datetime
+import json
+import threading
+
+import backtrader as bt
+import pytest
+
+"""unittest_live_feed.py -
+
+to run file,
+pytest unittest_live_feed.py
+
+"""
+
+
+def test_bar_builder_closes_bars_on_the_next_bar() -> None:
+    builder = BarBuilder(60)
+
+    assert builder.add_trade(1609459200.5, 100.0, 1.0) is None
+    assert builder.add_trade(1609459230.0, 105.0, 2.0) is None
+    assert builder.add_trade(1609459259.9,  95.0, 1.0) is None
+    assert builder.add_trade(1609459261.0,  96.0, 0.5) == (1609459200, 100.0, 105.0, 95.0, 95.0, 4.0)
+    assert builder.flush() == (1609459260, 96.0, 96.0, 96.0, 96.0, 0.5)
+    return
+
+def test_bar_builder_closes_bars_on_time() -> None:
+    builder = BarBuilder(60)
+
+    assert builder.add_trade(1609459200.5, 100.0, 1.0) is None
+    assert builder.close_due(1609459259.9) is None
+    assert builder.close_due(1609459260.0) == (1609459200, 100.0, 100.0, 100.0, 100.0, 1.0)
+    assert builder.add_trade(1609459259.9, 101.0, 1.0) is None # late, the bar is closed already
+    assert builder.add_trade(1609459261.0,  96.0, 0.5) is None
+    assert builder.flush() == (1609459260, 96.0, 96.0, 96.0, 96.0, 0.5)
+    return
+
+def test_bar_builder_checks_the_ohlc_interval() -> None:
+    builder = BarBuilder(60)
+
+    assert builder.add_ohlc(1609459200.0, 60, 100.0, 101.0, 99.0, 100.5, 2.0) is None
+    with pytest.raises(ValueError):
+        builder.add_ohlc(1609459200.0, 300, 100.0, 101.0, 99.0, 100.5, 2.0)
+    return
+
+def test_live_feed_pushes_bars_into_the_strategy(tmp_path) -> None:
+    messages = [{'event': 'heartbeat'},
+                [42, [["100.0", "1.0", "1609459200.5", "b", "m", ""], ["102.0", "1.0", "1609459210.0", "s", "l", ""]], "trade", "XBT/USD"],
+                [42, [["101.0", "0.5", "1609459265.0", "b", "m", ""]], "trade", "XBT/USD"],
+                [43, ["1609459320.1", "1609459380.0", "101.0", "103.0", "100.5", "102.5", "101.9", "3.0", 7], "ohlc-1", "XBT/USD"]]
+
+    path = tmp_path / 'recorded.jsonl'
+    path.write_text("\n".join(json.dumps(message) for message in messages))
+
+    closes = []
+
+    class Recorder(bt.Strategy):
+        def next(self) -> None:
+            closes.append((self.data.datetime.datetime(0), self.data.close[0]))
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(LiveKrakenData(source=FileReplaySource(str(path)), bar_seconds=60, qcheck=0.05))
+    cerebro.addstrategy(Recorder)
+    cerebro.run()
+
+    assert closes == [(datetime.datetime(2021, 1, 1, 0, 0), 102.0),
+                      (datetime.datetime(2021, 1, 1, 0, 1), 101.0),
+                      (datetime.datetime(2021, 1, 1, 0, 2), 102.5)]
+    return
+
+def test_quiet_market_bars_close_on_time() -> None:
+    class QuietSource():
+        """One trade and then nothing until the strategy saw the bar."""
+
+        def __init__(self) -> None:
+            self.now     = 1609459200.0
+            self.seen    = threading.Event()
+            self.in_time = False
+
+        def clock(self) -> float:
+            return self.now
+
+        def __iter__(self):
+            yield [42, [["100.0", "1.0", "1609459200.5", "b", "m", ""]], "trade", "XBT/USD"]
+            self.now     = 1609459265.0
+            self.in_time = self.seen.wait(5)
+
+    source = QuietSource()
+    closes = []
+
+    class Recorder(bt.Strategy):
+        def next(self) -> None:
+            closes.append((self.data.datetime.datetime(0), self.data.close[0]))
+            source.seen.set()
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(LiveKrakenData(source=source, bar_seconds=60, qcheck=0.05))
+    cerebro.addstrategy(Recorder)
+    cerebro.run()
+
+    assert source.in_time
+    assert closes == [(datetime.datetime(2021, 1, 1, 0, 0), 100.0)]
+    return
+
+def test_ohlc_channel_has_to_match_the_bars(tmp_path) -> None:
+    path = tmp_path / 'recorded.jsonl'
+    path.write_text(json.dumps([43, ["1609459320.1", "1609459500.0", "101.0", "103.0", "100.5", "102.5", "101.9", "3.0", 7], "ohlc-5", "XBT/USD"]))
+
+    cerebro = bt.Cerebro()
+    cerebro.adddata(LiveKrakenData(source=FileReplaySource(str(path)), bar_seconds=60, qcheck=0.05))
+    cerebro.addstrategy(bt.Strategy)
+
+    with pytest.raises(ValueError):
+        cerebro.run()
+    return
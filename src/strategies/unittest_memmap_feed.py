@@ -0,0 +1,41 @@
+from memmap_feed import MemmapData
+from ohlcv_store import load_ohlcv
+
+import datetime
+
+import backtrader as bt
+
+"""unittest_memmap_feed.py -
+
+to run file,
+pytest unittest_memmap_feed.py
+
+"""
+
+
+def test_memmap_feed_matches_pandas_feed(csv_path) -> None:
+    class Recorder(bt.Strategy):
+        def __init__(self) -> None:
+            self.bars = []
+            return
+
+        def next(self) -> None:
+            self.bars.append((self.data.datetime.datetime(0), self.data.open[0], self.data.close[0], self.data.volume[0]))
+            return
+
+    def run(data) -> list:
+        cerebro = bt.Cerebro(preload=False)
+        cerebro.adddata(data)
+        cerebro.addstrategy(Recorder)
+        return cerebro.run()[0].bars
+
+    start_date = datetime.datetime(2021, 1, 1, 0, 1)
+    end_date   = datetime.datetime(2021, 1, 1, 0, 3)
+    df         = load_ohlcv(csv_path)
+
+    expected = run(bt.feeds.PandasData(dataname=df, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date))
+    bars     = run(MemmapData(dataname=csv_path, timeframe=bt.TimeFrame.Minutes, fromdate=start_date, todate=end_date))
+
+    assert len(bars) == 3
+    assert bars == expected
+    return
@@ -0,0 +1,47 @@
+from ohlcv_dataset import get_dataset, TimeIndex
+from ohlcv_store   import get_cache_dir, read_cache_meta
+
+import datetime
+
+import numpy  as np
+import pytest
+
+"""unittest_ohlcv_dataset.py -
+
+to run file,
+pytest unittest_ohlcv_dataset.py
+
+"""
+
+
+def test_dataset_is_loaded_once(csv_path) -> None:
+    assert get_dataset(csv_path) is get_dataset(csv_path)
+    return
+
+def test_dataset_keeps_exact_prices_with_decimal_places(csv_path) -> None:
+    dataset = get_dataset(csv_path, 2)
+
+    assert read_cache_meta(get_cache_dir(csv_path))['schema']['price'] == 'int64'
+    assert dataset.df['Close'].tolist() == [28990.0, 29000.0, 29010.5, 29040.25]
+    assert dataset is get_dataset(csv_path, 2) and dataset is not get_dataset(csv_path)
+    return
+
+def test_dataset_window_is_a_slice(csv_path) -> None:
+    dataset = get_dataset(csv_path)
+    window  = dataset.get_window(datetime.datetime(2021, 1, 1, 0, 1), datetime.datetime(2021, 1, 1, 0, 2))
+
+    assert window['Close'].tolist() == [29000.0, 29010.5]
+    assert np.shares_memory(window['Close'].to_numpy(), dataset.df['Close'].to_numpy())
+    return
+
+def test_time_index_offsets() -> None:
+    time_index = TimeIndex(np.array([60, 120, 180, 240, 300]))
+
+    assert time_index.get_offsets(datetime.datetime(1970, 1, 1, 0, 2), datetime.datetime(1970, 1, 1, 0, 4)) == (1, 4)
+    assert time_index.get_offsets(datetime.datetime(1970, 1, 1, 0, 0), datetime.datetime(1970, 1, 1, 0, 30)) == (0, 5)
+    assert time_index.get_offsets(datetime.datetime(1970, 1, 1, 0, 6), datetime.datetime(1970, 1, 1, 0, 30)) == (5, 5)
+    assert time_index.get_offsets(datetime.datetime(1970, 1, 1, 0, 4), datetime.datetime(1970, 1, 1, 0, 2)) == (3, 3)
+
+    with pytest.raises(ValueError):
+        TimeIndex(np.array([60, 180, 120]))
+    return
@@ -0,0 +1,33 @@
+from ohlcv_panel import load_panel
+
+import datetime
+
+import numpy as np
+
+"""unittest_ohlcv_panel.py -
+
+to run file,
+pytest unittest_ohlcv_panel.py
+
+"""
+
+
+def test_panel_is_aligned_on_one_calendar(tmp_path) -> None:
+    (tmp_path / "AAA.csv").write_text("Date,Open,High,Low,Close,Adj Close,Volume\n"
+                                      "2004-08-19 00:00:00-04:00,1.0,2.0,0.5,1.5,1.5,100\n"
+                                      "2004-08-20 00:00:00-04:00,1.5,2.5,1.0,2.0,2.0,200\n"
+                                      "2004-08-23 00:00:00-04:00,2.0,3.0,1.5,2.5,2.5,300\n")
+    (tmp_path / "BBB.csv").write_text("Date,Open,High,Low,Close,Adj Close,Volume\n"
+                                      "2004-08-20,10.0,11.0,9.0,10.5,10.5,1000\n"
+                                      "2004-08-23,10.5,12.0,10.0,11.0,11.0,2000\n")
+
+    panel = load_panel(['AAA', 'BBB'], directory=str(tmp_path))
+    assert panel.values.shape == (2, 3, 5)
+    assert panel.get_field('Close')[0].tolist() == [1.5, 2.0, 2.5]
+    assert np.isnan(panel.get_field('Close')[1][0])
+    assert panel.get_frame('BBB')['Close'].tolist() == [10.5, 11.0]
+    assert panel.get_frame('BBB').index[0] == datetime.datetime(2004, 8, 20)
+
+    panel = load_panel(['AAA', 'BBB'], directory=str(tmp_path), how='inner')
+    assert panel.get_field('Volume').tolist() == [[200.0, 300.0], [1000.0, 2000.0]]
+    return
@@ -0,0 +1,96 @@
+from ohlcv_resample import load_resampled, resample_columns
+from ohlcv_store    import load_ohlcv
+
+import datetime
+
+import backtrader as bt
+import numpy      as np
+
+"""unittest_ohlcv_resample.py -
+
+to run file,
+pytest unittest_ohlcv_resample.py
+
+"""
+
+
+def test_resample_columns() -> None:
+    columns = {
+        'Epoch':  np.array([0, 60, 3600, 3660, 7260]),
+        'Open':   np.array([1.0, 2.0, 3.0, 4.0, 5.0], dtype=np.float32),
+        'High':   np.array([2.0, 5.0, 4.0, 6.0, 7.0], dtype=np.float32),
+        'Low':    np.array([0.5, 1.5, 2.5, 3.5, 4.5], dtype=np.float32),
+        'Close':  np.array([1.5, 2.5, 3.5, 4.5, 5.5], dtype=np.float32),
+        'Volume': np.array([1.0, 2.0, 3.0, 4.0, 5.0], dtype=np.float32),
+    }
+
+    bars = resample_columns(columns, 3600)
+    assert bars['Epoch'].tolist()  == [0, 3600, 7200]
+    assert bars['Open'].tolist()   == [1.0, 3.0, 5.0]
+    assert bars['High'].tolist()   == [5.0, 6.0, 7.0]
+    assert bars['Low'].tolist()    == [0.5, 2.5, 4.5]
+    assert bars['Close'].tolist()  == [2.5, 4.5, 5.5]
+    assert bars['Volume'].tolist() == [3.0, 7.0, 5.0]
+    return
+
+def test_resampled_bars_are_stamped_when_they_close(csv_path) -> None:
+    df = load_resampled(csv_path, '1d')
+
+    assert len(df) == 1
+    assert df.index[0] == datetime.datetime(2021, 1, 2)
+    assert df['Open'].iloc[0] == 28950.0
+    assert df['High'].iloc[0] == 29050.0
+    assert df['Low'].iloc[0] == 28940.0
+    assert df['Close'].iloc[0] == 29040.25
+    assert df['Volume'].iloc[0] == 4.5
+    return
+
+def test_resampled_feed_matches_resampledata(tmp_path) -> None:
+    path   = tmp_path / "gemini_BTCUSD_3days.csv"
+    start  = 1609459200 # 2021-01-01
+    minute = ["https://www.CryptoDataDownload.com", "Unix Timestamp,Date,Symbol,Open,High,Low,Close,Volume"]
+
+    for i in reversed(range(3 * 1440)):
+        date = datetime.datetime.fromtimestamp(start + i * 60, datetime.UTC).strftime("%Y-%m-%d %H:%M:%S")
+        minute.append(f"{(start + i * 60) * 1000},{date},BTCUSD,{100 + i},{101 + i},{99 + i},{100.5 + i},1.0")
+    path.write_text("\n".join(minute) + "\n")
+
+    class DayBuyer(bt.Strategy):
+        def __init__(self) -> None:
+            self.calls  = []
+            self.orders = []
+            return
+
+        def next(self) -> None:
+            self.calls.append((self.data.datetime.datetime(0), len(self.datas[1]), self.datas[1].close[0]))
+
+            # one market buy for every new day bar, a day bar seen twice buys twice
+            if len(self.calls) == 1 or self.calls[-1][1] != self.calls[-2][1]:
+                self.buy(size=1)
+            return
+
+        def notify_order(self, order) -> None:
+            if order.status == order.Completed:
+                self.orders.append((bt.num2date(order.executed.dt), order.executed.price))
+            return
+
+    def run(resampled: bool) -> DayBuyer:
+        cerebro = bt.Cerebro(stdstats=False)
+        data    = bt.feeds.PandasData(dataname=load_ohlcv(str(path)), timeframe=bt.TimeFrame.Minutes)
+        cerebro.adddata(data)
+
+        if resampled:
+            cerebro.adddata(bt.feeds.PandasData(dataname=load_resampled(str(path), '1d'), timeframe=bt.TimeFrame.Days))
+        else:
+            cerebro.resampledata(data, timeframe=bt.TimeFrame.Days)
+
+        cerebro.addstrategy(DayBuyer)
+        return cerebro.run()[0]
+
+    expected = run(resampled=False)
+    strategy = run(resampled=True)
+
+    assert len(strategy.calls) == len(expected.calls)
+    assert strategy.calls == expected.calls
+    assert strategy.orders == expected.orders and len(strategy.orders) == 2
+    return
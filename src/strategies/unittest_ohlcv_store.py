@@ -0,0 +1,130 @@
+from ohlcv_store import (load_ohlcv, build_cache, ingest_csv, read_gemini_csv, get_cache_dir, read_cache_meta, select_partitions,
+                         get_fingerprint, compute_fingerprint)
+from conftest    import GEMINI_CSV
+
+import datetime
+import os
+
+import numpy  as np
+import pytest
+
+"""unittest_ohlcv_store.py -
+
+to run file,
+pytest unittest_ohlcv_store.py
+
+"""
+
+
+def test_cache_matches_csv(csv_path) -> None:
+    expected = read_gemini_csv(csv_path)[::-1]
+    df       = load_ohlcv(csv_path)
+
+    assert os.path.isdir(get_cache_dir(csv_path))
+    assert df.index.strftime("%Y-%m-%d %H:%M:%S").tolist() == expected['Date'].tolist()
+    assert df.index.is_monotonic_increasing
+    assert df['Close'].tolist() == [28990.0, 29000.0, 29010.5, 29040.25]
+    assert df['Volume'].tolist() == expected['Volume'].tolist()
+    assert df.attrs['symbol'] == 'BTCUSD'
+    return
+
+def test_compact_schema(csv_path) -> None:
+    df = load_ohlcv(csv_path)
+    assert df['Close'].dtype == np.float32
+    assert df['Volume'].dtype == np.float32
+    assert 'Symbol' not in df.columns
+
+    df = load_ohlcv(csv_path, decimal_places=2)
+    assert np.load(os.path.join(get_cache_dir(csv_path), '2021', '01', 'Close.npy')).dtype == np.int64
+    assert df['Close'].tolist() == [28990.0, 29000.0, 29010.5, 29040.25]
+    return
+
+def test_ingest_keeps_ascending_files(tmp_path) -> None:
+    lines = GEMINI_CSV.splitlines()
+    path  = tmp_path / "ascending.csv"
+    path.write_text("\n".join(lines[:2] + lines[2:][::-1]) + "\n")
+
+    symbol, columns = ingest_csv(str(path))
+    assert symbol == 'BTCUSD'
+    assert columns['Epoch'].tolist() == [1609459200, 1609459260, 1609459320, 1609459380]
+    assert columns['Close'].tolist() == [28990.0, 29000.0, 29010.5, 29040.25]
+    return
+
+def test_ingest_rejects_unordered_files(tmp_path) -> None:
+    lines = GEMINI_CSV.splitlines()
+    path  = tmp_path / "unordered.csv"
+    path.write_text("\n".join(lines[:2] + [lines[2], lines[4], lines[3], lines[5]]) + "\n")
+
+    with pytest.raises(ValueError):
+        ingest_csv(str(path))
+    return
+
+def test_empty_csv_gives_an_empty_cache(tmp_path) -> None:
+    path = tmp_path / "empty.csv"
+    path.write_text("\n".join(GEMINI_CSV.splitlines()[:2]) + "\n")
+
+    df = load_ohlcv(str(path))
+    assert len(df) == 0 and list(df.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert read_cache_meta(get_cache_dir(str(path)))['partitions'] == []
+    return
+
+def test_cache_is_reused(csv_path, monkeypatch) -> None:
+    load_ohlcv(csv_path)
+
+    def fail(_):
+        raise AssertionError("csv was parsed again")
+
+    monkeypatch.setattr("ohlcv_store.read_gemini_csv", fail)
+    assert len(load_ohlcv(csv_path)) == 4
+    return
+
+def test_cache_is_rebuilt_when_csv_changes(csv_path) -> None:
+    load_ohlcv(csv_path)
+
+    with open(csv_path, 'a') as file:
+        file.write("1609459140000,2020-12-31 23:59:00,BTCUSD,28900.0,28960.0,28890.0,28950.0,3.0\n")
+
+    df = load_ohlcv(csv_path)
+    assert len(df) == 5
+    assert read_cache_meta(get_cache_dir(csv_path))['rows'] == 5
+    assert df['Close'].iloc[0] == 28950.0
+    return
+
+def test_fingerprint_follows_the_data(csv_path, tmp_path) -> None:
+    fingerprint = load_ohlcv(csv_path).attrs['fingerprint']
+    cache_dir   = get_cache_dir(csv_path)
+
+    assert fingerprint == get_fingerprint(cache_dir) == compute_fingerprint(cache_dir)
+
+    # the same bars in another file have the same fingerprint, the cache being rebuilt does not change it
+    copy_path = tmp_path / "copy.csv"
+    copy_path.write_text(GEMINI_CSV)
+    assert load_ohlcv(str(copy_path)).attrs['fingerprint'] == fingerprint
+
+    os.utime(csv_path, ns=(0, 0))
+    assert load_ohlcv(csv_path).attrs['fingerprint'] == fingerprint
+
+    with open(csv_path, 'a') as file:
+        file.write("1609459140000,2020-12-31 23:59:00,BTCUSD,28900.0,28960.0,28890.0,28950.0,3.0\n")
+
+    assert load_ohlcv(csv_path).attrs['fingerprint'] != fingerprint
+    return
+
+def test_month_partitions_are_pruned(csv_path) -> None:
+    with open(csv_path, 'a') as file:
+        file.write("1609459140000,2020-12-31 23:59:00,BTCUSD,28900.0,28960.0,28890.0,28950.0,3.0\n")
+
+    cache_dir = build_cache(csv_path)
+    meta      = read_cache_meta(cache_dir)
+    assert [(partition['name'], partition['rows']) for partition in meta['partitions']] == [('2020/12', 1), ('2021/01', 4)]
+
+    start_date = datetime.datetime(2021, 1, 1, 0, 2)
+    end_date   = datetime.datetime(2021, 1, 2)
+    assert [partition['name'] for partition in select_partitions(meta, start_date, end_date)] == ['2021/01']
+
+    df = load_ohlcv(csv_path, start_date, end_date)
+    assert df['Close'].tolist() == [29010.5, 29040.25]
+
+    df = load_ohlcv(csv_path, datetime.datetime(2020, 12, 31, 23, 59), datetime.datetime(2021, 1, 1))
+    assert df['Close'].tolist() == [28950.0, 28990.0]
+    return
@@ -0,0 +1,45 @@
+import ohlcv_validate
+
+from ohlcv_store    import build_cache
+from ohlcv_validate import validate_columns, validate_cache
+
+import numpy  as np
+import pytest
+
+"""unittest_ohlcv_validate.py -
+
+to run file,
+pytest unittest_ohlcv_validate.py
+
+"""
+
+
+def test_validation_finds_every_problem() -> None:
+    columns = {
+        'Epoch': np.array([0, 60, 60, 300, 240, 360], dtype=np.int64),
+        'Open':  np.array([10, 10, 10, 10, 10, 50], dtype=np.float32),
+        'High':  np.array([11, 11,  9, 11, 11, 11], dtype=np.float32),
+        'Low':   np.array([ 9,  9, 11,  9,  9,  9], dtype=np.float32),
+        'Close': np.array([10,  5, 10, 10, 10, 10], dtype=np.float32),
+    }
+
+    report = validate_columns(columns, bar_seconds=60)
+
+    assert report['duplicates']     == [2]
+    assert report['backwards']      == [4]
+    assert report['gaps']           == [[60, 300, 3], [240, 360, 1]]
+    assert report['high_below_low'] == [2]
+    assert report['open_outside']   == [2, 5]
+    assert report['close_outside']  == [1, 2]
+
+    return
+
+def test_validation_report_is_cached(csv_path, monkeypatch) -> None:
+    cache_dir = build_cache(csv_path)
+    report    = validate_cache(cache_dir)
+
+    assert report['rows'] == 4 and report['bar_seconds'] == 60 and report['gaps'] == []
+
+    monkeypatch.setattr(ohlcv_validate, 'validate_columns', lambda *args: pytest.fail("report was rebuilt"))
+    assert validate_cache(cache_dir) == report
+    return
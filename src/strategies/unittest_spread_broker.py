@@ -0,0 +1,38 @@
+from spread_broker import SpreadBroker, SpreadData
+from ohlcv_store   import load_ohlcv
+
+import backtrader as bt
+
+"""unittest_spread_broker.py -
+
+to run file,
+pytest unittest_spread_broker.py
+
+"""
+
+
+def test_spread_broker_fills_at_the_ask_and_bid(csv_path) -> None:
+    df           = load_ohlcv(csv_path)
+    df['Spread'] = [2.0, 4.0, 6.0, 8.0]
+    fills        = []
+
+    class RoundTrip(bt.Strategy):
+        def next(self) -> None:
+            if len(self) == 1:
+                self.buy(size=1)
+            elif len(self) == 2:
+                self.sell(size=1)
+
+        def notify_order(self, order) -> None:
+            if order.status == order.Completed:
+                fills.append(order.executed.price)
+
+    cerebro = bt.Cerebro()
+    cerebro.broker = SpreadBroker()
+    cerebro.broker.set_cash(100000)
+    cerebro.adddata(SpreadData(dataname=df, timeframe=bt.TimeFrame.Minutes))
+    cerebro.addstrategy(RoundTrip)
+    cerebro.run()
+
+    assert fills == [28990.0 + 2.0, 29000.0 - 3.0] # next bar's open +/- half its spread
+    return
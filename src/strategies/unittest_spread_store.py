@@ -0,0 +1,41 @@
+from spread_store import append_spreads, asof_join, join_spreads, read_spreads
+from ohlcv_store  import load_ohlcv
+
+import numpy as np
+
+"""unittest_spread_store.py -
+
+to run file,
+pytest unittest_spread_store.py
+
+"""
+
+
+def test_asof_join() -> None:
+    quote_epochs = np.array([100, 160, 400])
+    bid          = np.array([1.0, 2.0, 3.0])
+
+    assert np.array_equal(asof_join(np.array([50, 100, 200, 500]), quote_epochs, [bid])[0], [np.nan, 1.0, 2.0, 3.0], equal_nan=True)
+    assert np.array_equal(asof_join(np.array([200, 300]), quote_epochs, [bid], max_age=60)[0], [2.0, np.nan], equal_nan=True)
+    return
+
+def test_spreads_are_joined_to_the_bars(csv_path, tmp_path) -> None:
+    cache_dir = str(tmp_path / 'cache' / 'Kraken_XBTUSD_spreads')
+    quotes    = {'time': np.array([1609459190, 1609459300]), 'bid': np.array([28949.0, 29005.0]), 'ask': np.array([28951.0, 29006.0])}
+
+    assert append_spreads('XBTUSD', quotes, cache_dir) == 2
+
+    df = join_spreads(load_ohlcv(csv_path), cache_dir)
+
+    assert df['Spread'].tolist() == [2.0, 2.0, 1.0, 1.0]
+    assert df['Bid'].iloc[2] == 29005.0
+    return
+
+def test_pair_without_spreads_has_no_quotes(csv_path, tmp_path) -> None:
+    cache_dir = str(tmp_path / 'cache' / 'Kraken_ETHUSD_spreads')
+
+    assert [len(values) for values in read_spreads(cache_dir)] == [0, 0, 0]
+
+    df = join_spreads(load_ohlcv(csv_path), cache_dir)
+    assert df['Spread'].isna().all() and len(df) == 4
+    return
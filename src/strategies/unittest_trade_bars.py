@@ -0,0 +1,81 @@
+from trade_bars     import aggregate_trades, load_trade_bars, load_resampled_trade_bars
+from ohlcv_validate import validate_columns
+
+import datetime
+import os
+
+import numpy as np
+
+"""unittest_trade_bars.py -
+
+to run file,
+pytest unittest_trade_bars.py
+
+"""
+
+
+TRADES_CSV = """price,volume,time,buysell,ordtype,date,dollaramount
+100.0,1.0,1609459200.1,buy,limit,2021-01-01 00:00:00.100,100.0
+102.0,0.5,1609459201.2,sell,market,2021-01-01 00:00:01.200,51.0
+99.0,2.0,1609459203.9,buy,limit,2021-01-01 00:00:03.900,198.0
+101.0,1.0,1609459205.0,buy,market,2021-01-01 00:00:05.000,101.0
+"""
+
+def test_trade_bars() -> None:
+    times   = np.array([0.1, 1.2, 3.9, 5.0])
+    prices  = np.array([100.0, 102.0, 99.0, 101.0])
+    volumes = np.array([1.0, 0.5, 2.0, 1.0])
+
+    time_bars = aggregate_trades(times, prices, volumes, 'time', 5)
+    assert time_bars['Epoch'].tolist() == [0, 5]
+    assert [time_bars[column][0] for column in ['Open', 'High', 'Low', 'Close', 'Volume']] == [100.0, 102.0, 99.0, 99.0, 3.5]
+
+    tick_bars = aggregate_trades(times, prices, volumes, 'tick', 3)
+    assert tick_bars['Close'].tolist() == [99.0, 101.0]
+
+    volume_bars = aggregate_trades(times, prices, volumes, 'volume', 1.5) # the bar closes on the trade that crosses 1.5
+    assert volume_bars['Volume'].tolist() == [1.5, 2.0, 1.0]
+    assert volume_bars['Epoch'].tolist() == [0, 3, 5]
+
+    dollar_bars = aggregate_trades(times, prices, volumes, 'dollar', 150)
+    assert dollar_bars['Open'].tolist() == [100.0, 99.0, 101.0]
+    return
+
+def test_trade_bars_keep_the_second_of_their_first_trade() -> None:
+    times   = np.array([10.1, 10.2, 10.3, 10.4, 10.9, 11.5, 20.0])
+    prices  = np.full(7, 100.0)
+    volumes = np.ones(7)
+
+    tick_bars = aggregate_trades(times, prices, volumes, 'tick', 1)
+    assert tick_bars['Epoch'].tolist() == [10, 10, 10, 10, 10, 11, 20]
+
+    volume_bars = aggregate_trades(times, prices, volumes, 'volume', 2)
+    assert volume_bars['Epoch'].tolist() == [10, 10, 10, 20]
+    assert volume_bars['Volume'].tolist() == [2.0, 2.0, 2.0, 1.0]
+
+    columns = {'Epoch': tick_bars['Epoch'], 'Open': prices, 'High': prices, 'Low': prices, 'Close': prices}
+    assert validate_columns(columns)['duplicates'] == [1, 2, 3, 4]
+    assert validate_columns(columns, time_bars=False)['duplicates'] == []
+    assert validate_columns(columns, time_bars=False)['gaps'] == []
+    return
+
+def test_time_bars_are_resampled_into_day_bars(tmp_path) -> None:
+    path = tmp_path / 'Kraken_XBTUSD_tradeprints.csv'
+    path.write_text(TRADES_CSV)
+
+    df = load_resampled_trade_bars(str(path), 1, '1d')
+
+    assert df.index.tolist() == [datetime.datetime(2021, 1, 2)]
+    assert [df[column].iloc[0] for column in ['Open', 'High', 'Low', 'Close', 'Volume']] == [100.0, 102.0, 99.0, 101.0, 4.5]
+    return
+
+def test_trade_bars_are_cached(tmp_path) -> None:
+    path = tmp_path / 'Kraken_XBTUSD_tradeprints.csv'
+    path.write_text(TRADES_CSV)
+
+    df = load_trade_bars(str(path), 'time', 1)
+
+    assert df.index[0] == datetime.datetime(2021, 1, 1, 0, 0, 0)
+    assert df['Close'].tolist() == [100.0, 102.0, 99.0, 101.0]
+    assert os.path.isdir(tmp_path / 'cache' / 'Kraken_XBTUSD_tradeprints_time1')
+    return
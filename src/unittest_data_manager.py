@@ -0,0 +1,109 @@
+import data_manager
+
+from data_manifest import read_manifest, load_by_name
+from kraken_replay import ReplayServer, write_synthetic_recordings
+
+import os
+
+import numpy as np
+
+"""unittest_data_manager.py -
+
+to run file,
+pytest unittest_data_manager.py
+
+"""
+
+
+GEMINI_CSV = """https://www.CryptoDataDownload.com
+Unix Timestamp,Date,Symbol,Open,High,Low,Close,Volume
+1609459260000,2021-01-01 00:01:00,BTCUSD,28990.0,29005.0,28980.0,29000.0,2.0
+1609459200000,2021-01-01 00:00:00,BTCUSD,28950.0,28995.0,28940.0,28990.0,0.75
+"""
+
+
+def test_convert_resample_and_verify(tmp_path, capsys) -> None:
+    csv_path = str(tmp_path / 'gemini_BTCUSD_1min.csv')
+    manifest = str(tmp_path / 'manifest.json')
+
+    with open(csv_path, 'w') as file:
+        file.write(GEMINI_CSV)
+
+    assert data_manager.main(['--manifest', manifest, '--jobs', '2', 'convert', csv_path]) == 0
+    assert data_manager.main(['--manifest', manifest, 'resample', csv_path, '--timeframes', '1h', '1d']) == 0
+
+    entries = read_manifest(manifest)
+
+    assert sorted(entries) == ['gemini_BTCUSD_1min', 'gemini_BTCUSD_1min_1d', 'gemini_BTCUSD_1min_1h']
+    assert entries['gemini_BTCUSD_1min']['rows'] == 2
+    assert entries['gemini_BTCUSD_1min']['start'] == '2021-01-01 00:00:00'
+    assert load_by_name('gemini_BTCUSD_1min', manifest_path=manifest)['Close'].tolist() == [28990.0, 29000.0]
+
+    assert data_manager.main(['--manifest', manifest, 'verify']) == 0
+
+    close_path = os.path.join(entries['gemini_BTCUSD_1min']['cache_dir'], '2021', '01', 'Close.npy')
+    np.save(close_path, np.array([1.0, 2.0], dtype=np.float32))
+
+    assert data_manager.main(['--manifest', manifest, 'verify', 'gemini_BTCUSD_1min']) == 1
+    assert "gemini_BTCUSD_1min: CHANGED" in capsys.readouterr().out
+    return
+
+def test_fetch_records_the_datasets(tmp_path) -> None:
+    write_synthetic_recordings(str(tmp_path / 'recordings'), ['XBTUSD', 'ETHUSD'], rows=5)
+    server   = ReplayServer(str(tmp_path / 'recordings'))
+    manifest = str(tmp_path / 'manifest.json')
+
+    try:
+        assert data_manager.main(['--manifest', manifest, '--jobs', '4', 'fetch', 'XBTUSD', 'ETHUSD', '--api', server.url,
+                                  '--rate', '1000', '--burst', '1000', '--directory', str(tmp_path)]) == 0
+    finally:
+        server.close()
+
+    entries = read_manifest(manifest)
+
+    assert sorted(entries) == ['Kraken_ETHUSD_minute', 'Kraken_ETHUSD_spreads', 'Kraken_XBTUSD_minute', 'Kraken_XBTUSD_spreads']
+    assert entries['Kraken_XBTUSD_minute']['rows'] == 4 # the last bar is still open
+    assert entries['Kraken_XBTUSD_spreads']['rows'] == 5
+    return
+
+def test_failed_backfill_is_not_registered(tmp_path) -> None:
+    write_synthetic_recordings(str(tmp_path / 'recordings'), ['XBTUSD'], rows=10)
+    server   = ReplayServer(str(tmp_path / 'recordings'), rate_limit_every=1, page_size=4) # every call is rate limited
+    manifest = str(tmp_path / 'manifest.json')
+
+    try:
+        assert data_manager.main(['--manifest', manifest, '--jobs', '2', 'backfill', 'XBTUSD', 'ETHUSD', '--api', server.url,
+                                  '--rate', '1000', '--burst', '1000', '--retries', '1', '--directory', str(tmp_path)]) == 1
+    finally:
+        server.close()
+
+    assert read_manifest(manifest) == {}
+    return
+
+def test_failed_fetch_is_reported(tmp_path, capsys) -> None:
+    write_synthetic_recordings(str(tmp_path / 'recordings'), ['XBTUSD'], rows=5)
+    manifest = str(tmp_path / 'manifest.json')
+    server   = ReplayServer(str(tmp_path / 'recordings'))
+
+    try:
+        assert data_manager.main(['--manifest', manifest, 'fetch', 'XBTUSD', '--endpoints', 'OHLC', '--api', server.url,
+                                  '--rate', '1000', '--burst', '1000', '--directory', str(tmp_path)]) == 0
+
+        # the cache was built with float32 prices, exact prices are another schema
+        assert data_manager.main(['--manifest', manifest, 'fetch', 'XBTUSD', '--endpoints', 'OHLC', '--api', server.url,
+                                  '--rate', '1000', '--burst', '1000', '--decimal-places', '2', '--directory', str(tmp_path)]) == 1
+        assert "kraken OHLC XBTUSD 1: " in capsys.readouterr().out
+    finally:
+        server.close()
+
+    server = ReplayServer(str(tmp_path / 'recordings'), rate_limit_every=1) # every call is rate limited
+
+    try:
+        assert data_manager.main(['--manifest', manifest, 'fetch', 'XBTUSD', 'ETHUSD', '--endpoints', 'OHLC', '--api', server.url,
+                                  '--rate', '1000', '--burst', '1000', '--retries', '1', '--directory', str(tmp_path)]) == 1
+        assert "kraken OHLC ETHUSD 1: the request failed" in capsys.readouterr().out
+    finally:
+        server.close()
+
+    assert sorted(read_manifest(manifest)) == ['Kraken_XBTUSD_minute']
+    return
@@ -0,0 +1,191 @@
+import fetch_data
+
+from kraken_fetcher import KrakenFetcher
+from kraken_parse   import parse_ohlc, parse_spread, parse_trades
+from kraken_replay  import ReplayServer, write_synthetic_recordings
+
+import os
+import sys
+
+import numpy  as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategies'))
+
+import ohlcv_store
+
+from ohlcv_store import read_cache, read_cache_meta, compact_cache, compute_fingerprint, get_fingerprint
+
+"""unittest_fetch_data.py -
+
+to run file,
+pytest unittest_fetch_data.py
+
+"""
+
+
+START = 1609459200 # 2021-01-01 00:00:00
+
+
+def make_bars(count: int) -> list[list]:
+    """Kraken OHLC rows, the prices are strings like in the api responses"""
+    return [[START + i * 60, f"{100 + i}.0", f"{101 + i}.0", f"{99 + i}.0", f"{100 + i}.5", f"{100 + i}.2", "1.5", 3]
+            for i in range(count)]
+
+
+def serve_pages(monkeypatch, bars: list[list], page_size: int=3) -> list:
+    """Replaces the request with pages of page_size bars newer than since, the newest bar of all is still open"""
+    calls = []
+
+    def fetch_OHLC_page(symbol, timeframe, since=None, fetcher=None):
+        calls.append(since)
+        rows = [row for row in bars if since is None or row[0] > since][:page_size]
+        last = min(rows[-1][0], bars[-2][0]) if len(rows) > 0 else since
+        return rows, last
+
+    monkeypatch.setattr(fetch_data, 'fetch_OHLC_page', fetch_OHLC_page)
+    return calls
+
+
+def test_backfill_follows_the_cursor(tmp_path, monkeypatch) -> None:
+    cache_dir = str(tmp_path / 'Kraken_XBTUSD_minute')
+    calls     = serve_pages(monkeypatch, make_bars(8))
+
+    assert fetch_data.backfill_OHLC_data('XBTUSD', '1', cache_dir) == 7
+    assert calls[0] is None
+
+    df = read_cache(cache_dir)
+
+    assert df['Close'].tolist() == [100.5 + i for i in range(7)]
+    assert read_cache_meta(cache_dir)['pair'] == 'XBTUSD'
+    return
+
+def test_backfill_resumes_from_the_last_stored_bar(tmp_path, monkeypatch) -> None:
+    cache_dir = str(tmp_path / 'Kraken_XBTUSD_minute')
+
+    serve_pages(monkeypatch, make_bars(5))
+    assert fetch_data.backfill_OHLC_data('XBTUSD', '1', cache_dir) == 4
+
+    calls = serve_pages(monkeypatch, make_bars(10))
+    assert fetch_data.backfill_OHLC_data('XBTUSD', '1', cache_dir) == 5
+    assert calls[0] == START + 3 * 60
+
+    epochs = read_cache(cache_dir).index.values.astype('datetime64[s]').view(np.int64)
+    assert np.array_equal(epochs, START + np.arange(9) * 60)
+    return
+
+def test_backfill_raises_when_a_page_fails(tmp_path, monkeypatch) -> None:
+    cache_dir = str(tmp_path / 'Kraken_XBTUSD_minute')
+    bars      = make_bars(8)
+
+    def fetch_OHLC_page(symbol, timeframe, since=None, fetcher=None):
+        if since is not None and since >= START + 2 * 60:
+            return None # every retry failed
+        rows = [row for row in bars if since is None or row[0] > since][:3]
+        return rows, rows[-1][0]
+
+    monkeypatch.setattr(fetch_data, 'fetch_OHLC_page', fetch_OHLC_page)
+
+    with pytest.raises(RuntimeError):
+        fetch_data.backfill_OHLC_data('XBTUSD', '1', cache_dir)
+
+    assert read_cache_meta(cache_dir)['rows'] == 3 # kept for the next run to resume from
+    return
+
+def test_backfill_retries_rate_limited_pages(tmp_path) -> None:
+    write_synthetic_recordings(str(tmp_path / 'recordings'), ['XBTUSD'], rows=10)
+    server  = ReplayServer(str(tmp_path / 'recordings'), rate_limit_every=2, page_size=4)
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000, backoff=0.001)
+
+    try:
+        assert fetch_data.backfill_OHLC_data('XBTUSD', '1', str(tmp_path / 'cache'), fetcher=fetcher) == 9
+    finally:
+        fetcher.close()
+        server.close()
+    return
+
+def test_update_appends_a_segment(tmp_path, monkeypatch) -> None:
+    cache_dir = str(tmp_path / 'Kraken_XBTUSD_minute')
+
+    serve_pages(monkeypatch, make_bars(4), page_size=10)
+    assert fetch_data.update_OHLC_data('XBTUSD', '1', cache_dir) == (3, START + 2 * 60)
+
+    first   = read_cache_meta(cache_dir)['partitions']
+    written = os.stat(os.path.join(cache_dir, first[0]['name'], 'Close.npy')).st_mtime_ns
+
+    serve_pages(monkeypatch, make_bars(6), page_size=10)
+    assert fetch_data.update_OHLC_data('XBTUSD', '1', cache_dir) == (2, START + 4 * 60)
+
+    partitions = read_cache_meta(cache_dir)['partitions']
+
+    assert partitions[0] == first[0] and len(partitions) == 2
+    assert os.stat(os.path.join(cache_dir, first[0]['name'], 'Close.npy')).st_mtime_ns == written
+    assert read_cache(cache_dir)['Close'].tolist() == [100.5 + i for i in range(5)]
+
+    fingerprint = get_fingerprint(cache_dir)
+    compact_cache(cache_dir)
+
+    assert len(read_cache_meta(cache_dir)['partitions']) == 1
+    assert get_fingerprint(cache_dir) == compute_fingerprint(cache_dir) == fingerprint
+    assert read_cache(cache_dir)['Close'].tolist() == [100.5 + i for i in range(5)]
+    assert not os.path.exists(os.path.join(cache_dir, first[0]['name']))
+    return
+
+def test_updates_compact_a_month_of_many_segments(tmp_path, monkeypatch) -> None:
+    cache_dir = str(tmp_path / 'Kraken_XBTUSD_minute')
+    monkeypatch.setattr(ohlcv_store, 'MAX_SEGMENTS', 2)
+
+    for count in range(3, 7):
+        serve_pages(monkeypatch, make_bars(count), page_size=10)
+        fetch_data.update_OHLC_data('XBTUSD', '1', cache_dir)
+
+        assert len(read_cache_meta(cache_dir)['partitions']) <= 2
+
+    assert read_cache(cache_dir)['Close'].tolist() == [100.5 + i for i in range(5)]
+    assert get_fingerprint(cache_dir) == compute_fingerprint(cache_dir)
+    return
+
+def test_trades_are_parsed_into_typed_columns() -> None:
+    rows    = [["29000.1", "0.5", 1609459200.1234, "b", "m", "", 10],
+               ["29000.3", "2.0", 1609459201.5,    "s", "l", "", 11]]
+    columns = parse_trades(rows)
+
+    assert columns['price'].dtype == np.float64 and columns['trade_id'].tolist() == [10, 11]
+    assert columns['buysell'].dtype == np.int8 and columns['buysell'].tolist() == [1, -1]
+    assert columns['market'].dtype == bool and columns['market'].tolist() == [True, False]
+    assert np.allclose(columns['dollaramount'], [14500.05, 58000.6])
+    assert 'misc' not in columns
+    return
+
+def test_trade_prints_keep_the_csv_layout() -> None:
+    rows = [["29000.1", "0.5", 1609459200.1234, "b", "m", "", 10],
+            ["29000.3", "2.0", 1609459201.5,    "s", "l", "", 11]]
+    data = fetch_data.get_PRINTS_frame(parse_trades(rows))
+
+    assert list(data.columns) == ['price', 'volume', 'time', 'buysell', 'ordtype', 'date', 'dollaramount']
+    assert data['buysell'].tolist() == ['buy', 'sell']
+    assert data['ordtype'].tolist() == ['market', 'limit']
+    return
+
+def test_ohlc_and_spread_are_parsed_into_typed_columns() -> None:
+    ohlc   = parse_ohlc(make_bars(2))
+    spread = parse_spread([[1609459200, "29000.0", "29000.5"]])
+
+    assert ohlc['time'].dtype == np.int64 and ohlc['count'].dtype == np.int32
+    assert ohlc['volume_from'].tolist() == [1.5 * 100.5, 1.5 * 101.5]
+    assert spread['spread'].tolist() == [0.5]
+    assert len(parse_trades([])['price']) == 0
+    return
+
+def test_backfill_against_the_replay_server(tmp_path, monkeypatch) -> None:
+    write_synthetic_recordings(str(tmp_path / 'recordings'), ['XBTUSD'], rows=10)
+    server = ReplayServer(str(tmp_path / 'recordings'), page_size=4)
+
+    monkeypatch.setattr(fetch_data, 'KRAKEN_API', server.url)
+
+    try:
+        assert fetch_data.backfill_OHLC_data('XBTUSD', '1', str(tmp_path / 'cache'), pause=0.001) == 9 # the last bar is still open
+        assert fetch_data.update_SPREAD_data('XBTUSD', str(tmp_path / 'spreads')) == 4
+    finally:
+        server.close()
+    return
@@ -0,0 +1,163 @@
+from kraken_fetcher import KrakenFetcher, TokenBucket
+from kraken_replay  import ReplayServer, write_synthetic_recordings
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import json
+import threading
+import time
+
+import pytest
+
+"""unittest_kraken_fetcher.py -
+
+to run file,
+pytest unittest_kraken_fetcher.py
+
+"""
+
+
+class StandInServer():
+    """Local stand-in for the public Kraken endpoints: every call sleeps latency seconds,
+    the first `failures` calls answer with a rate limit error and the first `truncated` calls with half a json body."""
+
+    def __init__(self, latency: float=0.0, failures: int=0, truncated: int=0) -> None:
+        self.latency   = latency
+        self.failures  = failures
+        self.truncated = truncated
+        self.calls     = []
+        self.lock      = threading.Lock()
+
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                url    = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+                with stand_in.lock:
+                    stand_in.calls.append((url.path, params))
+                    failing   = len(stand_in.calls) <= stand_in.failures
+                    truncated = len(stand_in.calls) <= stand_in.truncated
+
+                time.sleep(stand_in.latency)
+
+                if failing:
+                    body = {'error': ['EAPI:Rate limit exceeded']}
+                else:
+                    body = {'error': [], 'result': {params['pair']: [[1609459200, url.path, params.get('interval')]], 'last': 1609459200}}
+
+                data = json.dumps(body).encode()
+
+                if truncated:
+                    data = data[:len(data) // 2]
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+
+            def log_message(self, *args) -> None:
+                return
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url    = f"http://127.0.0.1:{self.server.server_address[1]}/0/public"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        return
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(**kwargs) -> StandInServer:
+        servers.append(StandInServer(**kwargs))
+        return servers[-1]
+
+    yield start
+
+    for server in servers:
+        server.close()
+    return
+
+
+def test_every_job_is_fetched(stand_in) -> None:
+    server  = stand_in()
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000)
+    results = fetcher.fetch(['XBTUSD', 'ETHUSD'], intervals=['1', '60'])
+
+    assert len(results) == 8 # 2 pairs x (2 OHLC intervals + Spread + Trades)
+    assert results[('OHLC', 'ETHUSD', '60')] == ([[1609459200, '/0/public/OHLC', '60']], 1609459200)
+    assert results[('Trades', 'XBTUSD', None)] == ([[1609459200, '/0/public/Trades', None]], 1609459200)
+    return
+
+def test_requests_run_concurrently(stand_in) -> None:
+    server  = stand_in(latency=0.2)
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000, jobs=10)
+
+    start   = time.monotonic()
+    results = fetcher.fetch([f"PAIR{i}" for i in range(10)], endpoints=['OHLC'])
+
+    assert all(result is not None for result in results.values())
+    assert time.monotonic() - start < 1.0 # 10 x 0.2s one after the other
+    return
+
+def test_rate_limit_errors_are_retried(stand_in) -> None:
+    server  = stand_in(failures=2)
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000, backoff=0.01)
+
+    assert fetcher.fetch_rows('OHLC', 'XBTUSD', '1') is not None
+    assert len(server.calls) == 3
+    return
+
+def test_token_bucket_limits_the_rate() -> None:
+    bucket = TokenBucket(rate=20, capacity=1)
+    start  = time.monotonic()
+
+    for _ in range(5):
+        bucket.acquire()
+
+    assert time.monotonic() - start >= 0.19 # the first token is free, the next 4 take 1/20s each
+    return
+
+def test_replay_server_pages_the_recordings(tmp_path) -> None:
+    write_synthetic_recordings(str(tmp_path), ['XBTUSD'], rows=10)
+
+    server  = ReplayServer(str(tmp_path), page_size=4, rate_limit_every=2)
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000, backoff=0.01)
+
+    try:
+        rows, last = fetcher.fetch_rows('OHLC', 'XBTUSD', '1', since=1609459200 + 60)
+        assert [row[0] for row in rows] == [1609459200 + 60 * i for i in range(2, 6)]
+        assert last == rows[-1][0]
+
+        rows, last = fetcher.fetch_rows('Trades', 'XBTUSD', since=1609459200 * 10**9 + 5 * 10**8)
+        assert [row[2] for row in rows] == [1609459200.6, 1609459200.7, 1609459200.8, 1609459200.9]
+
+        assert fetcher.fetch_rows('Spread', 'ETHUSD') is None # not recorded
+        assert server.requests == 5 # every second call was rate limited and retried
+    finally:
+        fetcher.close()
+        server.close()
+    return
+
+def test_invalid_json_is_retried(stand_in) -> None:
+    server  = stand_in(truncated=2)
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000, backoff=0.001)
+
+    assert fetcher.fetch_rows('OHLC', 'XBTUSD', '1') == ([[1609459200, '/0/public/OHLC', '1']], 1609459200)
+    assert len(server.calls) == 3
+
+    fetcher = KrakenFetcher(server.url, rate=1000, burst=1000, retries=1, backoff=0.001)
+    server.calls, server.truncated = [], 5
+
+    assert fetcher.fetch(['XBTUSD'], endpoints=['Spread']) == {('Spread', 'XBTUSD', None): None} # the pool is not killed
+    return